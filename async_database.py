@@ -0,0 +1,227 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import namedtuple
+import pandas as pd
+import streamlit as st
+from database import (
+    shift_matrix_from_rows, rpc_available, is_missing_function_error, mark_function_missing,
+    shift_change_window_start
+)
+from repository import pivot_shift_rows
+from perf_trace import record
+
+# ページ表示に必要なデータ（読み込まなかった項目は None）
+PageData = namedtuple('PageData', ['work_days', 'employees', 'custom_holidays', 'shifts', 'revision', 'changes'])
+
+# load_page_data の中で実行した問い合わせの (名前, 秒数)
+_query_timings = contextvars.ContextVar('query_timings', default=None)
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop():
+    """非同期クライアント用のイベントループ（専用スレッドで動かし続ける）"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='supabase-async', daemon=True).start()
+    return _loop
+
+
+def run_async(coro, timeout=30):
+    """コルーチンを専用のイベントループで実行し、結果を待つ（同期ラッパー）"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result(timeout)
+
+
+class AsyncSupabaseDB:
+    """読み込み系の処理を並行して実行するための非同期版 SupabaseDB"""
+
+    def __init__(self, supabase_url, supabase_key, max_concurrency=4):
+        self._supabase_url = supabase_url
+        self._supabase_key = supabase_key
+        self._max_concurrency = max_concurrency
+        self._client = None
+        self._semaphore = None
+
+    async def _execute(self, name, build_query):
+        # クライアントとセマフォはイベントループ上で一度だけ作成する
+        if self._client is None:
+            from supabase import acreate_client
+            self._client = await acreate_client(self._supabase_url, self._supabase_key)
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                return await build_query(self._client).execute()
+            finally:
+                timings = _query_timings.get()
+                if timings is not None:
+                    timings.append((name, time.perf_counter() - started))
+
+    async def get_work_days(self, year, month):
+        response = await self._execute(
+            'get_work_days',
+            lambda client: client.table('work_days')
+                .select("days")
+                .eq('year', year)
+                .eq('month', month)
+        )
+        return response.data[0]['days'] if response.data else None
+
+    async def get_employees(self):
+        response = await self._execute(
+            'get_employees',
+            lambda client: client.table('employees')
+                .select("name")
+                .eq('is_active', True)
+                .order('display_order')
+        )
+        return [item['name'] for item in response.data]
+
+    async def get_custom_holidays(self, year, month):
+        start_date = pd.Timestamp(year, month, 16)
+        end_date = start_date + pd.DateOffset(months=1) - pd.Timedelta(days=1)
+        response = await self._execute(
+            'get_custom_holidays',
+            lambda client: client.table('custom_holidays')
+                .select("date")
+                .gte('date', start_date.strftime('%Y-%m-%d'))
+                .lte('date', end_date.strftime('%Y-%m-%d'))
+        )
+        return [pd.Timestamp(item['date']) for item in response.data]
+
+    async def get_shifts(self, start_date, end_date, page_size=1000):
+        start_date_str = start_date.strftime('%Y-%m-%d')
+        end_date_str = end_date.strftime('%Y-%m-%d')
+        if rpc_available('get_shift_matrix'):
+            try:
+                response = await self._execute(
+                    'get_shifts',
+                    lambda client: client.rpc('get_shift_matrix', {
+                        'start_date': start_date_str,
+                        'end_date': end_date_str
+                    })
+                )
+                return shift_matrix_from_rows(response.data)
+            except Exception as e:
+                if not is_missing_function_error(e):
+                    raise
+                mark_function_missing('get_shift_matrix')
+
+        # get_shift_matrix が未作成の場合は行単位で、max-rows で切り詰められないように page_size 件ずつ取得する
+        rows = []
+        while True:
+            response = await self._execute(
+                'get_shifts',
+                lambda client: client.table('shifts')
+                    .select("date,employee,shift")
+                    .gte('date', start_date_str)
+                    .lte('date', end_date_str)
+                    .order('date')
+                    .order('employee')
+                    .range(len(rows), len(rows) + page_size - 1)
+            )
+            rows.extend(response.data)
+            if len(response.data) < page_size:
+                return pivot_shift_rows(rows)
+
+    async def get_latest_shift_revision(self):
+        response = await self._execute(
+            'get_latest_shift_revision',
+            lambda client: client.table('shift_changes')
+                .select("revision")
+                .order('revision', desc=True)
+                .limit(1)
+        )
+        return response.data[0]['revision'] if response.data else 0
+
+    async def get_shift_changes_since(self, cursor, page_size=1000):
+        # 1回の応答が max-rows で切り詰められないように、page_size 件ずつ読む
+        changes = []
+        after = shift_change_window_start(cursor)
+        while True:
+            response = await self._execute(
+                'get_shift_changes_since',
+                lambda client: client.table('shift_changes')
+                    .select("revision,date,employee,shift")
+                    .gt('revision', after)
+                    .order('revision')
+                    .limit(page_size)
+            )
+            changes.extend(
+                (item['revision'], pd.Timestamp(item['date']), item['employee'],
+                 item['shift'] if item['shift'] is not None else '-')
+                for item in response.data
+            )
+            if response.data:
+                after = response.data[-1]['revision']
+            if len(response.data) < page_size:
+                return changes, max(cursor, after)
+
+    async def _shifts_with_revision(self, start_date, end_date):
+        # 取りこぼしを防ぐため、リビジョンはシフトより先に読む
+        revision = await self.get_latest_shift_revision()
+        return await self.get_shifts(start_date, end_date), revision
+
+    async def load_page_data(self, year, month, start_date, end_date, cursor=None,
+                             include_holidays=True, include_shifts=True, include_revision=False):
+        """ページ表示に必要な読み込みを並行して実行する
+
+        戻り値は (PageData, {項目名: 例外}, [(問い合わせ名, 秒数)])。失敗した項目は None になる。
+        """
+        timings = []
+        _query_timings.set(timings)
+        tasks = {
+            'work_days': self.get_work_days(year, month),
+            'employees': self.get_employees(),
+        }
+        if include_holidays:
+            tasks['custom_holidays'] = self.get_custom_holidays(year, month)
+        if include_shifts:
+            if include_revision:
+                tasks['shifts'] = self._shifts_with_revision(start_date, end_date)
+            else:
+                tasks['shifts'] = self.get_shifts(start_date, end_date)
+        if cursor is not None:
+            tasks['changes'] = self.get_shift_changes_since(cursor)
+
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        values = dict.fromkeys(PageData._fields)
+        errors = {}
+        for name, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                errors[name] = result
+            elif name == 'shifts' and include_revision:
+                values['shifts'], values['revision'] = result
+            else:
+                values[name] = result
+        return PageData(**values), errors, timings
+
+
+# エラー表示用の項目名
+_FIELD_LABELS = {
+    'work_days': '労働日数',
+    'employees': 'スタッフ情報',
+    'custom_holidays': 'カスタム祝日',
+    'shifts': 'シフトデータ',
+    'changes': 'シフト変更履歴',
+}
+
+
+def load_page_data(async_db, year, month, start_date, end_date, **options):
+    """Streamlit から呼び出すための同期版 load_page_data（エラーは画面に表示する）"""
+    try:
+        page, errors, timings = run_async(async_db.load_page_data(year, month, start_date, end_date, **options))
+    except Exception as e:
+        st.error(f"データの読み込みエラー: {e}")
+        return None
+    # 並行に実行した問い合わせも、呼び出し元の実行の DB 往復として記録する
+    for name, seconds in timings:
+        record(f'async.{name}', 'db', seconds)
+    for name, error in errors.items():
+        st.error(f"{_FIELD_LABELS[name]}の取得エラー: {error}")
+    return page
@@ -0,0 +1,60 @@
+import io
+import multiprocessing
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pdf_generator import generate_individual_pdf
+from pdf_styles import individual_styles
+
+# この人数以下の場合はプロセスプールを使わずに順番に生成する
+INLINE_EXPORT_LIMIT = 4
+
+
+def individual_pdf_file_name(employee, calendar):
+    """個別PDFのファイル名"""
+    return (f'{employee}さん_{calendar.start_date.strftime("%Y年%m月%d日")}～'
+            f'{calendar.end_date.strftime("%Y年%m月%d日")}_シフト.pdf')
+
+
+def _init_worker():
+    # フォントの登録とスタイルの作成はワーカーごとに一度だけ行う
+    individual_styles()
+
+
+def _render(employee, data, year, month, calendar):
+    started = time.perf_counter()
+    buffer = generate_individual_pdf(data, employee, year, month, calendar)
+    return employee, buffer.getvalue(), time.perf_counter() - started
+
+
+def _pool_context():
+    # Streamlit のサーバーはマルチスレッドのため fork は使わない
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def create_export_pool(max_workers=None):
+    """個別PDFの生成に使うプロセスプール（呼び出し側で使い回す）"""
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=_pool_context(), initializer=_init_worker)
+
+
+def export_individual_pdfs_zip(shift_data, employees, year, month, calendar, pool=None):
+    """全スタッフの個別PDFを生成し、1つの ZIP にまとめる
+
+    戻り値は (ZIP のバイト列, {従業員: 生成にかかった秒数})。
+    pool（create_export_pool で作成したもの）を渡した場合は並列に生成する。
+    pool がない場合と、人数が INLINE_EXPORT_LIMIT 以下の場合はこのプロセスで順番に生成する。
+    """
+    zip_buffer = io.BytesIO()
+    timings = {}
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        if pool is None or len(employees) <= INLINE_EXPORT_LIMIT:
+            results = (_render(emp, shift_data[emp], year, month, calendar) for emp in employees)
+        else:
+            futures = [pool.submit(_render, emp, shift_data[emp], year, month, calendar) for emp in employees]
+            # 生成できたものから順に ZIP へ書き込む
+            results = (future.result() for future in as_completed(futures))
+        for employee, pdf_bytes, elapsed in results:
+            zip_file.writestr(individual_pdf_file_name(employee, calendar), pdf_bytes)
+            timings[employee] = elapsed
+    return zip_buffer.getvalue(), timings
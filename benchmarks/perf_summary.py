@@ -0,0 +1,74 @@
+"""アプリの計測ログ（SHIFT_PERF_LOG の JSONL）を集計し、処理ごとの p50 / p95 を表示する
+
+使い方:
+    SHIFT_PERF_LOG=perf.jsonl streamlit run main.py   # 計測しながら利用する
+    python benchmarks/perf_summary.py perf.jsonl --output summary.json
+"""
+import argparse
+import json
+import math
+from collections import defaultdict
+
+
+def percentile(values, q):
+    """values の q パーセンタイル（最近傍法）"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def load_events(paths):
+    events = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            events.extend(json.loads(line) for line in f if line.strip())
+    return events
+
+
+def summarize(events):
+    """(種類, 処理名) ごとの件数・p50・p95・最大と、実行ごとの DB 往復回数の分布"""
+    durations = defaultdict(list)
+    round_trips = defaultdict(int)
+    reruns = set()
+    for event in events:
+        durations[(event['kind'], event['name'])].append(event['seconds'])
+        if event.get('rerun') is None:
+            continue
+        key = (event['session'], event['rerun'])
+        reruns.add(key)
+        if event['kind'] == 'db':
+            round_trips[key] += 1
+
+    rows = [
+        {'kind': kind, 'name': name, 'count': len(values), 'p50': percentile(values, 50),
+         'p95': percentile(values, 95), 'max': max(values)}
+        for (kind, name), values in durations.items()
+    ]
+    rows.sort(key=lambda row: row['p95'], reverse=True)
+    trips = [round_trips[key] for key in reruns]
+    return {
+        'stages': rows,
+        'reruns': len(reruns),
+        'round_trips': {'p50': percentile(trips, 50), 'p95': percentile(trips, 95), 'max': max(trips)} if trips else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='シフト管理の計測ログの集計')
+    parser.add_argument('logs', nargs='+', help='計測ログ（JSONL）')
+    parser.add_argument('--output', help='集計結果を保存する JSON ファイル')
+    args = parser.parse_args()
+
+    summary = summarize(load_events(args.logs))
+    for row in summary['stages']:
+        print(f"{row['kind']:<6} {row['name']:<30} n={row['count']:<6} p50={row['p50'] * 1000:9.2f} ms  "
+              f"p95={row['p95'] * 1000:9.2f} ms  max={row['max'] * 1000:9.2f} ms")
+    if summary['round_trips']:
+        trips = summary['round_trips']
+        print(f"実行 {summary['reruns']} 回  DB往復/実行 p50={trips['p50']}  p95={trips['p95']}  max={trips['max']}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
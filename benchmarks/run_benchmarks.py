@@ -0,0 +1,190 @@
+"""シフト表の主要な処理の実行時間を計測し、結果を JSON に保存する
+
+使い方:
+    python benchmarks/run_benchmarks.py --employees 7 50 200 --output bench.json
+    python benchmarks/run_benchmarks.py --compare bench.json   # 前回の結果と比較
+
+データベースには接続しないため、Supabase の接続情報は不要。
+PDF の計測には日本語フォントが必要（SHIFT_FONT_DIR で指定、見つからない場合は省略する）。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_employees, generate_shift_frame
+from period_calendar import PeriodCalendar
+from pdf_styles import FONT_DIR, FONT_FILES
+from shift_codec import _decode
+from shift_counter import calculate_shift_count
+from shift_table import render_grid_page, build_table_html, render_cell, render_shift_column
+from store_coverage import StoreCoverageIndex
+from utils import parse_shift, highlight_filled_shifts
+
+
+def _time(func, repeat):
+    """func を repeat 回実行し、各回の秒数のリストを返す"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _cold(func):
+    """解析結果のキャッシュを空にしてから func を実行する"""
+    def run():
+        _decode.cache_clear()
+        render_cell.cache_clear()
+        func()
+    return run
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def fonts_available():
+    return all(os.path.exists(os.path.join(FONT_DIR, name)) for name in FONT_FILES.values())
+
+
+def build_cases(shift_data, calendar, employees, year, month, include_pdf):
+    """計測する処理の {名前: 引数なしの関数}"""
+    cells = shift_data.to_numpy().ravel().tolist()
+    all_stores = sorted({store for value in cells for store in (parse_shift(value)[2] or []) if store})
+
+    def highlight():
+        coverage = StoreCoverageIndex.from_frame(shift_data)
+        for date in calendar.dates:
+            row = pd.Series('', index=['日付'] + all_stores)
+            row['日付'] = date.strftime('%Y-%m-%d')
+            highlight_filled_shifts(row, coverage)
+
+    def render_cells():
+        day_classes = calendar.display_classes()
+        for employee in shift_data.columns:
+            render_shift_column(shift_data[employee].tolist(), day_classes)
+
+    def table_html():
+        page, day_classes = render_grid_page(shift_data, calendar, employees, 0, len(shift_data))
+        build_table_html(page, row_classes=day_classes)
+
+    cases = {
+        'parse_shift': _cold(lambda: [parse_shift(value) for value in cells]),
+        'render_cell': _cold(render_cells),
+        'highlight_filled_shifts': _cold(highlight),
+        'calculate_shift_count': lambda: calculate_shift_count(shift_data),
+        'shift_table_html': _cold(table_html),
+    }
+    if include_pdf:
+        from pdf_generator import generate_help_table_pdf, generate_individual_pdf
+        help_data = shift_data.copy()
+        help_data.insert(0, '日付', help_data.index.strftime('%Y-%m-%d'))
+        help_data.insert(1, '曜日', help_data.index.map(calendar.weekday_label))
+        cases['generate_help_table_pdf'] = lambda: generate_help_table_pdf(help_data, year, month, calendar, 20)
+        cases['generate_individual_pdf'] = lambda: generate_individual_pdf(
+            shift_data[employees[0]], employees[0], year, month, calendar)
+    return cases
+
+
+def run(args):
+    include_pdf = not args.skip_pdf and fonts_available()
+    if not args.skip_pdf and not include_pdf:
+        print(f'フォントが見つからないため PDF の計測を省略します（{FONT_DIR}）', file=sys.stderr)
+    results = []
+    for count in args.employees:
+        employees = generate_employees(count)
+        calendar = PeriodCalendar(args.year, args.month, periods=args.periods)
+        shift_data = generate_shift_frame(employees, args.year, args.month, args.periods,
+                                          args.help_density, args.seed, calendar)
+        for name, func in build_cases(shift_data, calendar, employees, args.year, args.month, include_pdf).items():
+            if args.only and name not in args.only:
+                continue
+            timings = _time(func, args.repeat)
+            result = {
+                'name': name,
+                'employees': count,
+                'periods': args.periods,
+                'help_density': args.help_density,
+                'runs': args.repeat,
+                'min': min(timings),
+                'median': statistics.median(timings),
+                'mean': statistics.fmean(timings),
+            }
+            results.append(result)
+            print(f"{name:<26} employees={count:<5} median={result['median'] * 1000:9.2f} ms  "
+                  f"min={result['min'] * 1000:9.2f} ms")
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """前回の結果と中央値を比較し、threshold 倍を超えて遅くなったものを返す"""
+    previous = {(r['name'], r['employees'], r['periods']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get((result['name'], result['employees'], result['periods']))
+        if before is None:
+            continue
+        ratio = result['median'] / before['median'] if before['median'] else float('inf')
+        mark = '  <-- 遅くなっています' if ratio > threshold else ''
+        print(f"{result['name']:<26} employees={result['employees']:<5} x{ratio:6.2f}{mark}")
+        if ratio > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='シフト管理のベンチマーク')
+    parser.add_argument('--employees', type=int, nargs='+', default=[7, 50, 200], help='従業員数（複数指定可）')
+    parser.add_argument('--year', type=int, default=2026)
+    parser.add_argument('--month', type=int, default=1)
+    parser.add_argument('--periods', type=int, default=1, help='連続した期間数')
+    parser.add_argument('--help-density', type=float, default=0.3, help='平日にヘルプが入る割合')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='+', help='計測する処理の名前')
+    parser.add_argument('--skip-pdf', action='store_true', help='PDF の計測を省略する')
+    parser.add_argument('--output', help='結果を保存する JSON ファイル')
+    parser.add_argument('--compare', help='比較する前回の結果（JSON）')
+    parser.add_argument('--threshold', type=float, default=1.2, help='遅くなったと判定する倍率')
+    args = parser.parse_args()
+
+    current = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(current, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""起動時間の内訳（重いモジュールの import と DB の初期化）を計測する
+
+使い方:
+    python benchmarks/startup_report.py --repeat 5 --output startup.json
+
+各項目は新しい Python プロセスで計測するため、import のキャッシュの影響を受けない。
+Supabase の接続情報がない場合、クライアントの作成は失敗として記録する。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# 計測前に読み込んでおくもの（計測対象の前提となる import）と計測するコード
+TARGETS = {
+    'import jpholiday': ('', 'import jpholiday'),
+    'import reportlab.platypus': ('', 'import reportlab.platypus'),
+    'import pdf_generator': ('', 'import pdf_generator'),
+    'import database': ('', 'import database'),
+    'import main': ('', 'import main'),
+    'create_db()': ('import database', 'database.create_db()'),
+    'supabase client': ('import database', 'database.get_supabase_client()'),
+}
+
+# 子プロセスで実行するスクリプト（計測結果の秒数を最後の行に出力する）
+_CHILD = """
+import sys, time
+sys.path.insert(0, {root!r})
+{setup}
+started = time.perf_counter()
+{statement}
+print(time.perf_counter() - started)
+"""
+
+
+def measure(setup, statement):
+    """新しいプロセスで statement の実行時間を計測する（失敗した場合は None とエラー内容）"""
+    code = _CHILD.format(root=str(ROOT), setup=setup, statement=statement)
+    completed = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return None, lines[-1] if lines else f'exit {completed.returncode}'
+    return float(completed.stdout.strip().splitlines()[-1]), None
+
+
+def run(repeat, only=None):
+    results = []
+    for name, (setup, statement) in TARGETS.items():
+        if only and name not in only:
+            continue
+        timings, error = [], None
+        for _ in range(repeat):
+            seconds, error = measure(setup, statement)
+            if seconds is None:
+                break
+            timings.append(seconds)
+        if timings:
+            result = {'name': name, 'runs': len(timings), 'min': min(timings),
+                      'median': statistics.median(timings)}
+            print(f"{name:<28} median={result['median'] * 1000:9.2f} ms  min={result['min'] * 1000:9.2f} ms")
+        else:
+            result = {'name': name, 'runs': 0, 'error': error}
+            print(f'{name:<28} 失敗: {error}')
+        results.append(result)
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': os.environ.get('SHIFT_DB_BACKEND', 'supabase'),
+        },
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='シフト管理の起動時間の内訳')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='+', help='計測する項目の名前')
+    parser.add_argument('--output', help='結果を保存する JSON ファイル')
+    args = parser.parse_args()
+
+    report = run(args.repeat, args.only)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""ベンチマーク用の架空の組織とシフトを生成する"""
+import random
+import numpy as np
+import pandas as pd
+from constants import AREAS, EMPLOYEES
+from period_calendar import PeriodCalendar
+from shift_codec import Shift, encode_shift
+
+ALL_STORES = [store for stores in AREAS.values() for store in stores]
+
+# 出勤時間の候補（ヘルプは1日に1～2店舗）
+TIME_SLOTS = ['9-13', '9-18', '10-15', '10-19', '13-18', '14-19']
+
+
+def generate_employees(count):
+    """従業員名のリスト（先頭は実際の従業員、それ以降は連番）"""
+    names = list(EMPLOYEES[:count])
+    names += [f'スタッフ{i:03d}' for i in range(len(names) + 1, count + 1)]
+    return names
+
+
+def generate_shift_frame(employees, year, month, periods=1, help_density=0.3, seed=0, calendar=None):
+    """日付 × 従業員 のシフト表を生成する
+
+    help_density は平日にヘルプが入る割合。土日祝は'休み'、残りは有給・かご北・空欄を混ぜる。
+    """
+    rng = random.Random(seed)
+    if calendar is None:
+        calendar = PeriodCalendar(year, month, periods=periods)
+    day_off = calendar.day_off_mask
+
+    values = np.empty((len(calendar.dates), len(employees)), dtype=object)
+    for i in range(len(calendar.dates)):
+        for j in range(len(employees)):
+            if day_off[i]:
+                values[i, j] = '休み'
+                continue
+            roll = rng.random()
+            if roll < help_density:
+                stores = rng.sample(ALL_STORES, rng.choice([1, 1, 1, 2]))
+                times = sorted(rng.sample(TIME_SLOTS, len(stores)))
+                values[i, j] = encode_shift(Shift.from_parts('ヘルプ', times, stores))
+            elif roll < help_density + 0.05:
+                values[i, j] = '有給'
+            elif roll < help_density + 0.15:
+                values[i, j] = 'かご北'
+            else:
+                values[i, j] = ''
+    return pd.DataFrame(values, index=calendar.dates, columns=employees)
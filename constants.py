@@ -61,4 +61,13 @@ DARK_GREY_TEXT_COLOR = "#666666"
 SPECIAL_SHIFT_TYPES = ['休み', 'かご北']
 SATURDAY_BG_COLOR2 = '#0066FF'  # 土曜日の青色
 SUNDAY_BG_COLOR2 = '#FF7C80'    # 日曜日の赤色
-HOLIDAY_BG_COLOR2 = '#FF7C80'  # 祝日用の背景色（日曜日と同じ）
\ No newline at end of file
+HOLIDAY_BG_COLOR2 = '#FF7C80'  # 祝日用の背景色（日曜日と同じ）
+
+# 休み・有給の表示色（文字色, 背景色）を日付の表示区分ごとに定義
+DAY_OFF_COLORS = {
+    'holiday': (HOLIDAY_BG_COLOR2, HOLIDAY_BG_COLOR),
+    'saturday': (SATURDAY_BG_COLOR2, SATURDAY_BG_COLOR),
+    'weekday': ("#373737", HOLIDAY_BG_COLOR),
+}
+
+COVERAGE_GAP_BG_COLOR = '#FFC7CE'  # 店舗別表示で誰も入っていない日の背景色
@@ -1,51 +1,117 @@
 import os
+import functools
+import threading
 from datetime import datetime
 import pandas as pd
-from supabase import create_client, Client
 import streamlit as st
 from dotenv import load_dotenv
+from period_calendar import period_bounds
+from perf_trace import timed, timing
+from repository import (
+    ShiftRepository, request_memo, invalidates_request_memo, pivot_shift_rows, like_pattern, SHIFT_WRITE_BATCH
+)
 
 if not os.environ.get('STREAMLIT_CLOUD'):
     load_dotenv()
 
-class SupabaseDB:
-    def __init__(self):
+def get_supabase_credentials():
+    """Supabase の URL とキーを取得（.env → Streamlit secrets の順）"""
+    # .env はモジュールの読み込み時に反映済み
+    supabase_url = os.getenv("SUPABASE_URL")
+    supabase_key = os.getenv("SUPABASE_KEY")
+    
+    # If .env values are not available, try streamlit secrets
+    if not supabase_url or not supabase_key:
         try:
-            # First try loading from .env file
-            load_dotenv()
-            supabase_url = os.getenv("SUPABASE_URL")
-            supabase_key = os.getenv("SUPABASE_KEY")
-            
-            # If .env values are not available, try streamlit secrets
-            if not supabase_url or not supabase_key:
-                try:
-                    supabase_url = st.secrets["database"]["supabase_url"]
-                    supabase_key = st.secrets["database"]["supabase_key"]
-                except Exception:
-                    pass
-
-            if not supabase_url or not supabase_key:
-                st.error("データベース接続情報が見つかりません")
-                st.write("Current values:", {
-                    "url_exists": bool(supabase_url),
-                    "key_exists": bool(supabase_key)
-                })
-                raise Exception("Supabase の認証情報が設定されていません")
-                
-            self.supabase: Client = create_client(supabase_url, supabase_key)
-            
-        except Exception as e:
-            st.error(f"データベース接続エラー: {str(e)}")
-            raise
+            supabase_url = st.secrets["database"]["supabase_url"]
+            supabase_key = st.secrets["database"]["supabase_key"]
+        except Exception:
+            pass
+
+    if not supabase_url or not supabase_key:
+        st.error("データベース接続情報が見つかりません")
+        st.write("Current values:", {
+            "url_exists": bool(supabase_url),
+            "key_exists": bool(supabase_key)
+        })
+        raise Exception("Supabase の認証情報が設定されていません")
+
+    return supabase_url, supabase_key
+
+def shift_matrix_from_rows(rows):
+    """get_shift_matrix の結果（1日1行）から 日付 × 従業員 の DataFrame を作成"""
+    if not rows:
+        return pd.DataFrame()
+    index = pd.DatetimeIndex([row['date'] for row in rows])
+    return pd.DataFrame([row['shifts'] for row in rows], index=index)
+
+_client_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def _create_supabase_client(supabase_url, supabase_key):
+    # supabase パッケージの読み込みも初回の接続まで遅らせる
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
+
+def get_supabase_client():
+    """Supabase クライアントを取得（初回に作成し、同じ接続情報では使い回す）"""
+    supabase_url, supabase_key = get_supabase_credentials()
+    with _client_lock:
+        return _create_supabase_client(supabase_url, supabase_key)
 
+# shift_changes の revision は挿入時に採番されるため、並行するトランザクションでは
+# 小さい revision が後からコミットされることがある。取りこぼさないように、
+# 変更履歴は cursor よりこの件数だけ前から読み直す（反映済みの変更は ChangeTracker で除く）。
+# 1件の保存が一括保存をまたいでコミットされても届くよう、一括保存2回分の revision を読み直す
+# （save_shifts_bulk は1回のリクエストで SHIFT_WRITE_BATCH 件より多く保存しない）
+SHIFT_CHANGE_OVERLAP = 2 * SHIFT_WRITE_BATCH
+
+def shift_change_window_start(cursor):
+    """get_shift_changes_since で読み直す範囲の開始（この revision より後を読む）"""
+    return max(cursor - SHIFT_CHANGE_OVERLAP, 0)
+
+# 未作成と分かったデータベース関数（以降は rpc を呼ばずに従来の処理を行う）
+_missing_functions = set()
+
+def is_missing_function_error(error):
+    """rpc の呼び出し先の関数が未作成の場合のエラーか（PostgREST: PGRST202、Postgres: 42883）"""
+    return getattr(error, 'code', None) in ('PGRST202', '42883')
+
+def rpc_available(name):
+    return name not in _missing_functions
+
+def mark_function_missing(name):
+    _missing_functions.add(name)
+
+class SupabaseDB(ShiftRepository):
+    def __init__(self):
+        # 接続は最初の問い合わせまで作成しない（import 時に認証情報やネットワークを必要としない）
+        self._client = None
+
+    @property
+    def supabase(self):
+        if self._client is None:
+            try:
+                self._client = get_supabase_client()
+            except Exception as e:
+                st.error(f"データベース接続エラー: {str(e)}")
+                raise
+        return self._client
+
+    def _execute(self, name, query):
+        """問い合わせを実行する（1回の HTTP リクエストを DB往復として記録する）"""
+        with timing(name, kind='db'):
+            return query.execute()
+
+    @request_memo
     def get_work_days(self, year, month):
         try:
             start_date = f"{year}-{month:02d}-16"
-            response = self.supabase.table('work_days')\
+            query = self.supabase.table('work_days')\
                 .select("days")\
                 .eq('year', year)\
-                .eq('month', month)\
-                .execute()
+                .eq('month', month)
+            response = self._execute('get_work_days', query)
             
             return response.data[0]['days'] if response.data else None
             
@@ -53,190 +119,336 @@ class SupabaseDB:
             st.error(f"労働日数の取得エラー: {e}")
             return None
 
+    @invalidates_request_memo
     def save_work_days(self, year, month, days):
+        """労働日数を保存し、保存後の行を返す（失敗した場合は False）"""
         try:
-            # Delete existing record if exists
-            self.supabase.table('work_days')\
-                .delete()\
-                .eq('year', year)\
-                .eq('month', month)\
-                .execute()
-            
-            # Insert new record
             data = {
                 'year': year,
                 'month': month,
                 'days': days
             }
-            
-            self.supabase.table('work_days')\
-                .insert(data)\
-                .execute()
-                
-            return True
-            
+
+            # (year, month) をキーに1回のリクエストで登録・更新する
+            query = self.supabase.table('work_days')\
+                .upsert(data, on_conflict='year,month')
+            response = self._execute('save_work_days', query)
+
+            return response.data[0] if response.data else data
+
         except Exception as e:
             st.error(f"労働日数の保存エラー: {e}")
             return False
             
+    @timed(kind='call')
     def init_db(self):
         try:
-            self.supabase.table('shifts').select("*").limit(1).execute()
+            self._execute('init_db', self.supabase.table('shifts').select("*").limit(1))
             return True
         except Exception as e:
             st.error(f"データベース接続エラー: {e}")
             return False
 
-    def get_shifts(self, start_date, end_date):
+    @request_memo
+    def get_shifts(self, start_date, end_date, page_size=1000):
+        """start_date から end_date までのシフトを 日付 × 従業員 の DataFrame で取得
+
+        取得に失敗した場合は None（一部だけ読めた結果は返さない）。
+        """
+        start_date_str = start_date.strftime('%Y-%m-%d')
+        end_date_str = end_date.strftime('%Y-%m-%d')
+        if rpc_available('get_shift_matrix'):
+            try:
+                # サーバー側で 日付 × 従業員 の形にしたものを受け取る（1日1行のため max-rows には届かない）
+                response = self._execute('get_shifts', self.supabase.rpc('get_shift_matrix', {
+                    'start_date': start_date_str,
+                    'end_date': end_date_str
+                }))
+                return shift_matrix_from_rows(response.data)
+            except Exception as e:
+                if not is_missing_function_error(e):
+                    st.error(f"シフトデータの取得エラー: {e}")
+                    return None
+                mark_function_missing('get_shift_matrix')
+
+        # get_shift_matrix が未作成の場合は必要な列だけを取得してピボットする
+        # （1回の応答が max-rows で切り詰められないように、page_size 件ずつ読む）
+        rows = []
         try:
-            start_date_str = start_date.strftime('%Y-%m-%d')
-            end_date_str = end_date.strftime('%Y-%m-%d')
-            
-            response = self.supabase.table('shifts')\
-                .select("*")\
-                .gte('date', start_date_str)\
-                .lte('date', end_date_str)\
-                .execute()
-            
-            if not response.data:
-                return pd.DataFrame()
-            
-            df = pd.DataFrame(response.data)
-            df['date'] = pd.to_datetime(df['date'])
-            
-            pivot_df = df.pivot(index='date', columns='employee', values='shift')
-            return pivot_df
-            
+            while True:
+                query = self.supabase.table('shifts')\
+                    .select("date,employee,shift")\
+                    .gte('date', start_date_str)\
+                    .lte('date', end_date_str)\
+                    .order('date')\
+                    .order('employee')\
+                    .range(len(rows), len(rows) + page_size - 1)
+                response = self._execute('get_shifts', query)
+                rows.extend(response.data)
+                if len(response.data) < page_size:
+                    return pivot_shift_rows(rows)
         except Exception as e:
             st.error(f"シフトデータの取得エラー: {e}")
-            return pd.DataFrame()
+            return None
 
+    @invalidates_request_memo
     def save_shift(self, date, employee, shift_str):
+        """シフトを保存し、保存後の行を返す（失敗した場合は False）
+
+        shift_str が '-' の場合はレコードを削除し、shift が None の行を返す。
+        """
         try:
             date_str = date.strftime('%Y-%m-%d')
-            
-            # 既存のレコードを削除
-            self.supabase.table('shifts')\
-                .delete()\
-                .match({'date': date_str, 'employee': employee})\
-                .execute()
-                
-            # シフトが'-'の場合は削除のみ行い、新規レコードは作成しない
+
+            # シフトが'-'の場合は削除のみ行う
             if shift_str == '-':
-                return True
-                
-            # データの形式を確認
+                query = self.supabase.table('shifts')\
+                    .delete()\
+                    .match({'date': date_str, 'employee': employee})
+                self._execute('save_shift', query)
+                return {'date': date_str, 'employee': employee, 'shift': None}
+
             data = {
                 'date': date_str,
                 'employee': employee,
                 'shift': shift_str
             }
-            
-            # Supabaseへの保存を試行
-            response = self.supabase.table('shifts')\
-                .insert(data)\
-                .execute()
-            
-            return True
+
+            # (date, employee) をキーに1回のリクエストで登録・更新する（途中で空になる瞬間がない）
+            query = self.supabase.table('shifts')\
+                .upsert(data, on_conflict='date,employee')
+            response = self._execute('save_shift', query)
+
+            return response.data[0] if response.data else data
         except Exception as e:
             st.error(f"シフトの保存エラー: {e}")
             return False
 
-    def get_custom_holidays(self, year, month):
-        """カスタム祝日を取得"""
+    @invalidates_request_memo
+    def save_shifts_bulk(self, records, chunk_size=SHIFT_WRITE_BATCH):
+        """複数のシフトを一括保存し、保存に失敗したレコードのリストを返す
+
+        records は (date, employee, shift_str) のタプル列。
+        同じ (date, employee) が複数ある場合は後のものを優先する。
+        shift_str が '-' のレコードは削除としてまとめて処理する。
+        1回のリクエストで保存する件数は chunk_size と SHIFT_WRITE_BATCH の小さい方まで。
+        """
+        chunk_size = min(chunk_size, SHIFT_WRITE_BATCH)
+        # (date, employee) ごとに最後の値だけを残す
+        latest = {}
+        for date, employee, shift_str in records:
+            latest[(pd.Timestamp(date).normalize(), employee)] = shift_str
+
+        upserts = []
+        deletes = {}
+        for (date, employee), shift_str in latest.items():
+            if shift_str == '-':
+                deletes.setdefault(employee, []).append(date)
+            else:
+                upserts.append((date, employee, shift_str))
+
+        failed = []
+
+        # 削除は従業員ごとに chunk_size 日分ずつ1回のリクエストで行う
+        for employee, dates in deletes.items():
+            for i in range(0, len(dates), chunk_size):
+                chunk = dates[i:i + chunk_size]
+                try:
+                    query = self.supabase.table('shifts')\
+                        .delete()\
+                        .eq('employee', employee)\
+                        .in_('date', [d.strftime('%Y-%m-%d') for d in chunk])
+                    self._execute('save_shifts_bulk', query)
+                except Exception as e:
+                    st.error(f"シフトの一括削除エラー ({employee}): {e}")
+                    failed.extend((d, employee, '-') for d in chunk)
+
+        # 登録・更新は (date, employee) をキーにチャンク単位で upsert する
+        for i in range(0, len(upserts), chunk_size):
+            chunk = upserts[i:i + chunk_size]
+            rows = [
+                {'date': d.strftime('%Y-%m-%d'), 'employee': e, 'shift': s}
+                for d, e, s in chunk
+            ]
+            try:
+                query = self.supabase.table('shifts')\
+                    .upsert(rows, on_conflict='date,employee')
+                self._execute('save_shifts_bulk', query)
+            except Exception as e:
+                st.error(f"シフトの一括保存エラー: {e}")
+                # どの行が失敗したか特定するため1件ずつ再試行する
+                for d, emp, s in chunk:
+                    if not self.save_shift(d, emp, s):
+                        failed.append((d, emp, s))
+
+        return failed
+
+    @request_memo
+    def get_latest_shift_revision(self):
+        """シフト変更履歴の最新リビジョンを取得（履歴がない場合は 0）"""
         try:
-            start_date = f"{year}-{month:02d}-16"
-            next_month = pd.Timestamp(year, month, 16) + pd.DateOffset(months=1)
-            end_date = f"{next_month.year}-{next_month.month:02d}-15"
+            query = self.supabase.table('shift_changes')\
+                .select("revision")\
+                .order('revision', desc=True)\
+                .limit(1)
+            response = self._execute('get_latest_shift_revision', query)
             
-            response = self.supabase.table('custom_holidays')\
+            return response.data[0]['revision'] if response.data else 0
+        except Exception as e:
+            st.error(f"シフト変更履歴の取得エラー: {e}")
+            return None
+
+    @timed(kind='call')
+    def get_shift_changes_since(self, cursor, page_size=1000):
+        """cursor 付近以降のシフト変更を取得し、(変更リスト, 新しい cursor) を返す
+
+        変更は (revision, date, employee, shift_str) のタプルで、削除は shift_str が '-'。
+        後からコミットされた変更を取りこぼさないよう、cursor より SHIFT_CHANGE_OVERLAP 件前から読み直す。
+        """
+        changes = []
+        after = shift_change_window_start(cursor)
+        try:
+            while True:
+                query = self.supabase.table('shift_changes')\
+                    .select("revision,date,employee,shift")\
+                    .gt('revision', after)\
+                    .order('revision')\
+                    .limit(page_size)
+                response = self._execute('get_shift_changes_since', query)
+                
+                for item in response.data:
+                    shift_str = item['shift'] if item['shift'] is not None else '-'
+                    changes.append((item['revision'], pd.Timestamp(item['date']), item['employee'], shift_str))
+                if response.data:
+                    after = response.data[-1]['revision']
+                if len(response.data) < page_size:
+                    return changes, max(cursor, after)
+        except Exception as e:
+            st.error(f"シフト変更履歴の取得エラー: {e}")
+            return changes, max(cursor, after)
+
+    def get_custom_holidays(self, year, month):
+        """カスタム祝日を取得（読み込みの重複排除は get_custom_holidays_between で行う）"""
+        return self.get_custom_holidays_between(*period_bounds(year, month))
+
+    @request_memo
+    def get_custom_holidays_between(self, start_date, end_date):
+        """期間を問わず、start_date から end_date までのカスタム祝日を取得"""
+        try:
+            query = self.supabase.table('custom_holidays')\
                 .select("date")\
-                .gte('date', start_date)\
-                .lte('date', end_date)\
-                .execute()
+                .gte('date', start_date.strftime('%Y-%m-%d'))\
+                .lte('date', end_date.strftime('%Y-%m-%d'))
+            response = self._execute('get_custom_holidays_between', query)
             
             return [pd.Timestamp(item['date']) for item in response.data]
         except Exception as e:
             st.error(f"カスタム祝日の取得エラー: {e}")
             return []
 
+    @invalidates_request_memo
     def add_custom_holiday(self, date):
         """カスタム祝日を追加"""
         try:
             date_str = date.strftime('%Y-%m-%d')
-            self.supabase.table('custom_holidays')\
-                .insert({'date': date_str})\
-                .execute()
+            query = self.supabase.table('custom_holidays')\
+                .insert({'date': date_str})
+            self._execute('add_custom_holiday', query)
             return True
         except Exception as e:
             st.error(f"カスタム祝日の追加エラー: {e}")
             return False
 
+    @invalidates_request_memo
     def remove_custom_holiday(self, date):
         """カスタム祝日を削除"""
         try:
             date_str = date.strftime('%Y-%m-%d')
-            self.supabase.table('custom_holidays')\
+            query = self.supabase.table('custom_holidays')\
                 .delete()\
-                .eq('date', date_str)\
-                .execute()
+                .eq('date', date_str)
+            self._execute('remove_custom_holiday', query)
             return True
         except Exception as e:
             st.error(f"カスタム祝日の削除エラー: {e}")
             return False    
         
+    @request_memo
     def get_employees(self):
         """スタッフ一覧を取得"""
         try:
-            response = self.supabase.table('employees')\
+            query = self.supabase.table('employees')\
                 .select("*")\
                 .eq('is_active', True)\
-                .order('display_order')\
-                .execute()
+                .order('display_order')
+            response = self._execute('get_employees', query)
             
             return [item['name'] for item in response.data]
         except Exception as e:
             st.error(f"スタッフ情報の取得エラー: {e}")
             return []
 
+    @request_memo
     def get_all_employees(self):
         """全てのスタッフ情報を取得（管理用）"""
         try:
-            response = self.supabase.table('employees')\
+            query = self.supabase.table('employees')\
                 .select("*")\
-                .order('display_order')\
-                .execute()
+                .order('display_order')
+            response = self._execute('get_all_employees', query)
             
             return response.data
         except Exception as e:
             st.error(f"スタッフ情報の取得エラー: {e}")
             return []
 
+    @request_memo
+    def get_employees_page(self, search='', offset=0, limit=50):
+        """スタッフ情報を1ページ分取得し、(スタッフ情報のリスト, 条件に合う人数) を返す（管理用）
+
+        search は名前の部分一致（空の場合は全員）。取得に失敗した場合は None。
+        """
+        try:
+            query = self.supabase.table('employees')\
+                .select("id,name,display_order,is_active", count='exact')
+            if search:
+                query = query.ilike('name', like_pattern(search))
+            query = query.order('display_order')\
+                .range(offset, offset + limit - 1)
+            response = self._execute('get_employees_page', query)
+
+            return response.data, response.count or 0
+        except Exception as e:
+            st.error(f"スタッフ情報の取得エラー: {e}")
+            return None
+
+    @invalidates_request_memo
     def add_employee(self, name):
         """新しいスタッフを追加"""
         try:
             # 現在の最大display_orderを取得
-            response = self.supabase.table('employees')\
+            query = self.supabase.table('employees')\
                 .select("display_order")\
                 .order('display_order', desc=True)\
-                .limit(1)\
-                .execute()
+                .limit(1)
+            response = self._execute('add_employee', query)
             
             max_order = response.data[0]['display_order'] if response.data else 0
             
             # 新しいスタッフを追加
-            self.supabase.table('employees')\
+            query = self.supabase.table('employees')\
                 .insert({
                     'name': name,
                     'display_order': max_order + 1,
                     'is_active': True
-                })\
-                .execute()
+                })
+            self._execute('add_employee', query)
             return True
         except Exception as e:
             st.error(f"スタッフの追加エラー: {e}")
             return False
 
+    @invalidates_request_memo
     def update_employee(self, id, name=None, display_order=None, is_active=None):
         """スタッフ情報を更新"""
         try:
@@ -249,64 +461,125 @@ class SupabaseDB:
                 update_data['is_active'] = is_active
 
             if update_data:
-                self.supabase.table('employees')\
+                query = self.supabase.table('employees')\
                     .update(update_data)\
-                    .eq('id', id)\
-                    .execute()
+                    .eq('id', id)
+                self._execute('update_employee', query)
+            return True
+        except Exception as e:
+            st.error(f"スタッフ情報の更新エラー: {e}")
+            return False
+
+    @invalidates_request_memo
+    def set_employees_active(self, id_active_pairs):
+        """複数のスタッフの有効・無効をまとめて更新（値ごとに1回のリクエスト）"""
+        try:
+            ids_by_value = {}
+            for emp_id, is_active in id_active_pairs:
+                ids_by_value.setdefault(bool(is_active), []).append(emp_id)
+
+            for is_active, ids in ids_by_value.items():
+                query = self.supabase.table('employees')\
+                    .update({'is_active': is_active})\
+                    .in_('id', ids)
+                self._execute('set_employees_active', query)
             return True
         except Exception as e:
             st.error(f"スタッフ情報の更新エラー: {e}")
             return False
 
+    @invalidates_request_memo
     def reorder_employees(self, id_order_pairs):
         """スタッフの表示順序を更新"""
+        if rpc_available('reorder_employees'):
+            try:
+                # サーバー側で1つのトランザクションとしてまとめて更新する
+                self._execute('reorder_employees', self.supabase.rpc('reorder_employees', {
+                    'orders': [{'id': emp_id, 'display_order': new_order} for emp_id, new_order in id_order_pairs]
+                }))
+                return True
+            except Exception as e:
+                if not is_missing_function_error(e):
+                    st.error(f"表示順序の更新エラー: {e}")
+                    return False
+                mark_function_missing('reorder_employees')
+
+        # reorder_employees が未作成の場合は1件ずつ更新する
         try:
             # 一時的な大きな数値を使用して更新
             temp_order = 10000
             
             for emp_id, new_order in id_order_pairs:
                 # まず一時的な値に更新
-                self.supabase.table('employees')\
+                query = self.supabase.table('employees')\
                     .update({'display_order': temp_order + new_order})\
-                    .eq('id', emp_id)\
-                    .execute()
+                    .eq('id', emp_id)
+                self._execute('reorder_employees', query)
             
             # 次に実際の値に更新
             for emp_id, new_order in id_order_pairs:
-                self.supabase.table('employees')\
+                query = self.supabase.table('employees')\
                     .update({'display_order': new_order})\
-                    .eq('id', emp_id)\
-                    .execute()
+                    .eq('id', emp_id)
+                self._execute('reorder_employees', query)
                 
             return True
         except Exception as e:
             st.error(f"表示順序の更新エラー: {e}")
             return False
         
+    @invalidates_request_memo
     def delete_employee(self, id):
         """スタッフを完全に削除"""
+        if rpc_available('delete_employee_compact'):
+            try:
+                # 削除と表示順序の振り直しをサーバー側で1回で行う
+                self._execute('delete_employee', self.supabase.rpc('delete_employee_compact', {'employee_id': id}))
+                return True
+            except Exception as e:
+                if not is_missing_function_error(e):
+                    st.error(f"スタッフの削除エラー: {e}")
+                    return False
+                mark_function_missing('delete_employee_compact')
+
+        # delete_employee_compact が未作成の場合は従来どおり1件ずつ振り直す
         try:
-            self.supabase.table('employees')\
+            query = self.supabase.table('employees')\
                 .delete()\
-                .eq('id', id)\
-                .execute()
+                .eq('id', id)
+            self._execute('delete_employee', query)
             
             # 残りのスタッフの表示順序を整理
-            response = self.supabase.table('employees')\
+            query = self.supabase.table('employees')\
                 .select("*")\
-                .order('display_order')\
-                .execute()
+                .order('display_order')
+            response = self._execute('delete_employee', query)
             
             # 表示順序を1から振り直し
             for i, emp in enumerate(response.data, 1):
-                self.supabase.table('employees')\
+                query = self.supabase.table('employees')\
                     .update({'display_order': i})\
-                    .eq('id', emp['id'])\
-                    .execute()
+                    .eq('id', emp['id'])
+                self._execute('delete_employee', query)
             
             return True
         except Exception as e:
             st.error(f"スタッフの削除エラー: {e}")
             return False
+
+def create_db():
+    """環境変数 SHIFT_DB_BACKEND（supabase / sqlite）に応じた保存先を作成
+
+    sqlite の場合は SHIFT_SQLITE_PATH のファイルを使う（既定はこのディレクトリの shifts.db）。
+    """
+    backend = os.getenv('SHIFT_DB_BACKEND', 'supabase').lower()
+    if backend == 'sqlite':
+        from sqlite_database import SQLiteDB
+        default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shifts.db')
+        return SQLiteDB(os.getenv('SHIFT_SQLITE_PATH', default_path))
+    if backend != 'supabase':
+        raise ValueError(f"未対応のデータベース: {backend}")
+    return SupabaseDB()
+
 # データベースのシングルトンインスタンスを作成
-db = SupabaseDB()
\ No newline at end of file
+db = create_db()
\ No newline at end of file
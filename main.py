@@ -2,60 +2,249 @@ import streamlit as st
 st.set_page_config(layout="wide")
 
 import pandas as pd
-import jpholiday
+import numpy as np
+import os
+import time
 from datetime import datetime
 import asyncio
-from database import db
-from pdf_generator import generate_help_table_pdf, generate_individual_pdf
+from concurrent.futures.process import BrokenProcessPool
+from database import db, get_supabase_credentials, SupabaseDB, SHIFT_CHANGE_OVERLAP
+from async_database import AsyncSupabaseDB, PageData, load_page_data
+from pdf_generator import generate_help_table_pdf, generate_individual_pdf, generate_store_coverage_pdf
+from batch_export import create_export_pool, export_individual_pdfs_zip, individual_pdf_file_name
 from constants import (
     SHIFT_TYPES, 
     WEEKDAY_JA, 
-    AREAS, 
-    SATURDAY_BG_COLOR, 
-    HOLIDAY_BG_COLOR, 
-    HOLIDAY_BG_COLOR2,
-    SATURDAY_BG_COLOR2
+    AREAS
 )
-from utils import parse_shift, format_shifts, update_session_state_shifts, highlight_weekend_and_holiday
+from period_calendar import PeriodCalendar, period_bounds, period_range
+from shift_cache import ShiftCache, ChangeTracker
+from store_coverage import StoreCoverageIndex
+from write_behind import WriteBehindQueue
+from perf_trace import timed, timing, begin_rerun, end_rerun, render_debug_panel
+from shift_codec import Shift, encode_shift
+from shift_counter import calculate_shift_count, count_by_shift_type, count_by_store
+from utils import parse_shift
+from shift_table import (
+    STORE_CLASSES, shift_table_css, render_grid_page, render_coverage_cell, build_table_html
+)
+
+CALENDAR_TTL = 3600
+
+# シフト表の1ページあたりの表示日数
+PAGE_SIZE_OPTIONS = [7, 15, 31, 62]
+DEFAULT_PAGE_SIZE = 15
+
+# スタッフ管理の1ページあたりの表示人数
+ROSTER_PAGE_SIZE_OPTIONS = [20, 50, 100]
+DEFAULT_ROSTER_PAGE_SIZE = 20
 
 @st.cache_data(ttl=10)  # 1分間キャッシュ
 def get_active_employees():
     """有効なスタッフ一覧を取得"""
     return db.get_employees()
 
-@st.cache_data(ttl=3600)
+class RosterUnavailable(Exception):
+    """スタッフ一覧の取得に失敗した（失敗した結果をキャッシュしないために例外にする）"""
+
+@st.cache_data(ttl=600)
+def get_roster_page(search, offset, limit):
+    """スタッフ管理の1ページ分（スタッフ情報を変更したときは invalidate_roster で破棄する）"""
+    page = db.get_employees_page(search, offset, limit)
+    if page is None:
+        raise RosterUnavailable()
+    return page
+
+def load_roster_page(search, offset, page_size):
+    """前後のページとの入れ替えのため、ページの前後1人ずつも含めて読み込む（失敗した場合は None）"""
+    try:
+        return get_roster_page(search, max(offset - 1, 0), page_size + 2)
+    except RosterUnavailable:
+        return None
+
+def invalidate_roster():
+    """スタッフの追加・更新・削除の後に、スタッフ一覧のキャッシュを破棄する"""
+    get_roster_page.clear()
+    get_active_employees.clear()
+
+@st.cache_resource
+def get_shift_cache():
+    """期間ごとのシフトキャッシュ（全セッションで共有）"""
+    return ShiftCache(db.get_shifts, max_periods=12, ttl=3600,
+                      revision_loader=db.get_latest_shift_revision, change_overlap=SHIFT_CHANGE_OVERLAP)
+
+@st.cache_resource
+def get_write_behind_queue():
+    """保存を後回しにする書き込みキュー（全セッションで共有）
+
+    ジャーナルの保存先は環境変数 SHIFT_JOURNAL_PATH で変更できる。
+    """
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shift_journal.jsonl')
+    return WriteBehindQueue(db, os.getenv('SHIFT_JOURNAL_PATH', default_path),
+                            on_flushed=get_shift_cache().write_through)
+
 def get_cached_shifts(year, month):
-    start_date = pd.Timestamp(year, month, 16)
-    end_date = start_date + pd.DateOffset(months=1) - pd.Timedelta(days=1)
-    return db.get_shifts(start_date, end_date)
-
-def initialize_shift_data(year, month):
-    start_date = pd.Timestamp(year, month, 16)
-    end_date = start_date + pd.DateOffset(months=1) - pd.Timedelta(days=1)
-    date_range = pd.date_range(start=start_date, end=end_date)
-    
-    # アクティブな従業員リストを取得
-    employees = get_active_employees()
-    
-    # シフトデータを取得
-    shifts = get_cached_shifts(year, month)
+    return get_shift_cache().get(year, month)
+
+@st.cache_resource
+def get_async_db():
+    """並行読み込み用の非同期クライアント（全セッションで共有、Supabase 以外では None）"""
+    if not isinstance(db, SupabaseDB):
+        return None
+    return AsyncSupabaseDB(*get_supabase_credentials())
+
+@st.cache_resource
+def get_export_pool():
+    """個別PDFの一括生成に使うプロセスプール（全セッションで共有）"""
+    return create_export_pool()
+
+def export_all_individual_pdfs(shift_data, employees, year, month, calendar):
+    """全スタッフの個別PDFを共有のプロセスプールで生成する（プールが壊れていた場合は作り直す）"""
+    try:
+        return export_individual_pdfs_zip(shift_data, employees, year, month, calendar, pool=get_export_pool())
+    except BrokenProcessPool:
+        get_export_pool.clear()
+        return export_individual_pdfs_zip(shift_data, employees, year, month, calendar, pool=get_export_pool())
+
+@st.cache_resource
+def get_calendar_registry():
+    """期間ごとの日付区分表（全セッションで共有）"""
+    return {}
+
+def is_period_calendar_cached(year, month):
+    entry = get_calendar_registry().get((year, month))
+    return entry is not None and time.monotonic() - entry[0] < CALENDAR_TTL
+
+def get_period_calendar(year, month, custom_holidays=None):
+    """期間ごとの日付区分表を取得（カスタム祝日の変更時は差分更新する）"""
+    registry = get_calendar_registry()
+    if not is_period_calendar_cached(year, month):
+        if custom_holidays is None:
+            custom_holidays = db.get_custom_holidays(year, month)
+        registry[(year, month)] = (time.monotonic(), PeriodCalendar(year, month, custom_holidays))
+    return registry[(year, month)][1]
+
+@timed()
+def load_shift_page(year, month):
+    """シフト管理画面で必要な読み込みを並行して実行し、各キャッシュに反映する"""
+    shift_cache = get_shift_cache()
+    same_period = ('shift_data' in st.session_state and
+                   st.session_state.current_year == year and
+                   st.session_state.current_month == month)
+    start_date, end_date = period_bounds(year, month)
+
+    async_db = get_async_db()
+    if async_db is None:
+        # ローカルの保存先は往復のコストが小さいため順番に読み込む
+        return PageData(db.get_work_days(year, month), get_active_employees(), None, None, None, None)
+
+    # キャッシュ済みのものは読み込まない
+    page = load_page_data(
+        async_db, year, month, start_date, end_date,
+        cursor=st.session_state.get('shift_cursor') if same_period else None,
+        include_holidays=not is_period_calendar_cached(year, month),
+        include_shifts=not shift_cache.contains(year, month),
+        include_revision=shift_cache.cursor is None
+    )
+    if page is None:
+        # 並行読み込みに失敗した場合は従来どおり順番に読み込む
+        return PageData(db.get_work_days(year, month), get_active_employees(), None, None, None, None)
+
+    # 同じ実行内の同期呼び出し（PDF生成など）でも読み直さないように登録する
+    if page.work_days is not None:
+        db.prime_request_memo('get_work_days', (year, month), page.work_days)
+    if page.employees is not None:
+        db.prime_request_memo('get_employees', (), page.employees)
+    if page.custom_holidays is not None:
+        db.prime_request_memo('get_custom_holidays_between', period_bounds(year, month), page.custom_holidays)
+        get_period_calendar(year, month, page.custom_holidays)
+    if page.shifts is not None:
+        shift_cache.put(year, month, page.shifts, page.revision)
+    if page.employees is None:
+        page = page._replace(employees=get_active_employees())
+    return page
+
+def empty_shift_value(calendar, date):
+    """シフト未登録のセルの値（土日、祝日、カスタム祝日は'休み'）"""
+    return '休み' if calendar.is_day_off(date) else ''
+
+def build_shift_frame(calendar, employees, shifts):
+    """保存済みのシフトから期間分のセッション用DataFrameを作成"""
+    # 期間・従業員に合わせた配列に、未登録のセルだけ既定値を埋める
+    values = shifts.reindex(index=calendar.dates, columns=employees).to_numpy(dtype=object)
+    defaults = np.where(calendar.day_off_mask, '休み', '').astype(object)
+    missing = pd.isna(values)
+    values[missing] = np.broadcast_to(defaults[:, None], values.shape)[missing]
+    return pd.DataFrame(values, index=calendar.dates, columns=employees)
+
+def get_store_coverage():
+    """セッションのシフトに対応する (日付, 店舗) → 従業員 の索引"""
+    if 'store_coverage' not in st.session_state:
+        st.session_state.store_coverage = StoreCoverageIndex.from_frame(st.session_state.shift_data)
+    return st.session_state.store_coverage
+
+def set_session_shifts(shift_data):
+    """セッションのシフトを置き換え、店舗の担当索引も作り直す"""
+    st.session_state.shift_data = shift_data
+    st.session_state.store_coverage = StoreCoverageIndex.from_frame(shift_data)
+
+def set_session_shift(date, employee, value):
+    """セッションのシフトを1セルだけ更新し、店舗の担当索引にも反映する"""
+    st.session_state.shift_data.loc[date, employee] = value
+    get_store_coverage().update(date, employee, value)
+
+def refresh_session_row(calendar, date):
+    """1日分のセッションデータを保存済みのシフトから作り直す"""
+    shifts = get_cached_shifts(calendar.year, calendar.month)
+    date = pd.Timestamp(date)
+    employees = list(st.session_state.shift_data.columns)
+    for employee, value in build_shift_frame(calendar, employees, shifts).loc[date].items():
+        set_session_shift(date, employee, value)
+
+def sync_shift_changes(calendar, changes=None):
+    """前回以降に保存されたシフトの変更だけを取り込む
+
+    changes には並行読み込み済みの (変更リスト, 新しい cursor) を渡せる。
+    """
+    cursor = st.session_state.get('shift_cursor')
+    if cursor is None:
+        # 変更履歴が使えない場合はキャッシュの内容で置き換える
+        employees = list(st.session_state.shift_data.columns)
+        shifts = get_cached_shifts(calendar.year, calendar.month)
+        set_session_shifts(build_shift_frame(calendar, employees, shifts))
+        return
+    changes, new_cursor = changes if changes is not None else db.get_shift_changes_since(cursor)
+    if changes:
+        get_shift_cache().apply_changes(changes)
+        # cursor より前から読み直した変更のうち、このセッションで未反映のものだけを取り込む
+        tracker = st.session_state.shift_change_tracker
+        changes = tracker.unapplied(changes, cursor)
+        shift_data = st.session_state.shift_data
+        for _, date, employee, shift_str in changes:
+            if date in shift_data.index and employee in shift_data.columns:
+                set_session_shift(date, employee, empty_shift_value(calendar, date) if shift_str == '-' else shift_str)
+        tracker.mark_applied(changes, new_cursor)
+    st.session_state.shift_cursor = new_cursor
+
+def apply_pending_writes(calendar):
+    """まだ保存されていない書き込みをセッションデータに重ねる"""
+    shift_data = st.session_state.shift_data
+    for date, employee, shift_str in get_write_behind_queue().pending_records():
+        if date in shift_data.index and employee in shift_data.columns:
+            set_session_shift(date, employee, empty_shift_value(calendar, date) if shift_str == '-' else shift_str)
+
+@timed()
+def initialize_shift_data(year, month, employees, changes=None):
+    calendar = get_period_calendar(year, month)
     
     if ('shift_data' not in st.session_state or 
         st.session_state.current_year != year or 
         st.session_state.current_month != month):
-        # 新しいDataFrameを作成
-        st.session_state.shift_data = pd.DataFrame(
-            index=date_range,
-            columns=employees,
-            data=''
-        )
-        
-        # 既存のシフトデータがあれば更新
-        if not shifts.empty:
-            for emp in employees:
-                if emp in shifts.columns:
-                    st.session_state.shift_data[emp].update(shifts[emp])
-        
+        # 期間が変わった場合のみ全体を読み込む
+        shifts, cursor = get_shift_cache().get_with_cursor(year, month)
+        set_session_shifts(build_shift_frame(calendar, employees, shifts))
+        st.session_state.shift_cursor = cursor
+        st.session_state.shift_change_tracker = ChangeTracker(SHIFT_CHANGE_OVERLAP)
         st.session_state.current_year = year
         st.session_state.current_month = month
     else:
@@ -63,50 +252,62 @@ def initialize_shift_data(year, month):
         current_employees = st.session_state.shift_data.columns
         new_employees = [emp for emp in employees if emp not in current_employees]
         
-        for emp in new_employees:
-            st.session_state.shift_data[emp] = ''
-    
-    # カスタム祝日を取得
-    custom_holidays = db.get_custom_holidays(year, month)
-    
-    # 土日、祝日、カスタム祝日に'休み'を設定
-    for date in date_range:
-        if (date.weekday() >= 5 or  # 5=土曜日, 6=日曜日
-            jpholiday.is_holiday(date) or  # 通常の祝日
-            date in custom_holidays):  # カスタム祝日
-            st.session_state.shift_data.loc[date, :] = '休み'
+        if new_employees:
+            shifts = get_cached_shifts(year, month)
+            new_columns = build_shift_frame(calendar, new_employees, shifts)
+            coverage = get_store_coverage()
+            for emp in new_employees:
+                st.session_state.shift_data[emp] = new_columns[emp]
+                for date, value in new_columns[emp].items():
+                    coverage.update(date, emp, value)
+
+        # 他の編集者による変更は差分だけ反映する
+        sync_shift_changes(calendar, changes)
+
+    apply_pending_writes(calendar)
+
+def with_date_columns(shift_data, calendar):
+    """日付と曜日の列を先頭に追加した表（PDF出力用）"""
+    data = shift_data.copy()
+    data.insert(0, '日付', data.index.strftime('%Y-%m-%d'))
+    data.insert(1, '曜日', data.index.map(calendar.weekday_label))
+    return data
+
+def paginate_rows(total_rows, state_key='current_page', size_options=PAGE_SIZE_OPTIONS,
+                  default_size=DEFAULT_PAGE_SIZE, size_label='1ページの表示日数'):
+    """ページ送りのボタンを表示し、現在のページの行範囲 (start, stop) を返す"""
+    page_size = st.selectbox(size_label, size_options,
+                             index=size_options.index(default_size), key=f'{state_key}_size')
+    total_pages = max(-(-total_rows // page_size), 1)
+
+    if state_key not in st.session_state:
+        st.session_state[state_key] = 1
+    # 表示日数を変えた場合などにページ数を超えないようにする
+    st.session_state[state_key] = min(st.session_state[state_key], total_pages)
 
-def calculate_shift_count(shift_data):
-    def count_shift(shift):
-        if pd.isna(shift) or shift == '休み':
-            return 0
-        return 1  # 「休み」以外は全てカウント（ハイフンを含む）
-
-    return shift_data.apply(lambda x: x.map(count_shift)).sum()
+    col1, col2, col3 = st.columns([2,3,2])
+    with col1:
+        if st.button('◀◀ 最初', key=f'{state_key}_first'):
+            st.session_state[state_key] = 1
+        if st.button('◀ 前へ', key=f'{state_key}_prev') and st.session_state[state_key] > 1:
+            st.session_state[state_key] -= 1
+    with col2:
+        st.write(f'ページ {st.session_state[state_key]} / {total_pages}')
+    with col3:
+        if st.button('最後 ▶▶', key=f'{state_key}_last'):
+            st.session_state[state_key] = total_pages
+        if st.button('次へ ▶', key=f'{state_key}_next') and st.session_state[state_key] < total_pages:
+            st.session_state[state_key] += 1
 
+    start = (st.session_state[state_key] - 1) * page_size
+    return start, start + page_size
 
-def display_shift_table(selected_year, selected_month):
-    start_date = pd.Timestamp(selected_year, selected_month, 16)
-    end_date = start_date + pd.DateOffset(months=1) - pd.Timedelta(days=1)
-    
-    # アクティブな従業員リストを取得
-    employees = get_active_employees()
+def display_shift_table(selected_year, selected_month, employees, work_days):
+    calendar = get_period_calendar(selected_year, selected_month)
+    start_date, end_date = calendar.start_date, calendar.end_date
     
-    # シフトデータをコピー
-    display_data = st.session_state.shift_data.loc[start_date:end_date].copy()
-    
-    # 日付と曜日の列を追加
-    display_data.insert(0, '日付', display_data.index.strftime('%Y-%m-%d'))
-    display_data.insert(1, '曜日', display_data.index.strftime('%a').map(WEEKDAY_JA))
-    
-    # 必要な列のみを選択（日付、曜日、アクティブな従業員）
-    keep_columns = ['日付', '曜日'] + [emp for emp in employees if emp in display_data.columns]
-    display_data = display_data[keep_columns]
-    
-    # 新しい従業員の列を追加（データがない場合は空文字列を設定）
-    for emp in employees:
-        if emp not in display_data.columns:
-            display_data[emp] = ''
+    # 期間・アクティブな従業員に絞った表（コピーや書式設定はしない）
+    shift_data = st.session_state.shift_data.loc[start_date:end_date].reindex(columns=employees, fill_value='')
 
     # スタイルの設定
     st.markdown("""
@@ -135,12 +336,13 @@ def display_shift_table(selected_year, selected_month):
         border-radius: 4px;
         margin: 2px;
     }
+    """ + shift_table_css() + """
     </style>
     """, unsafe_allow_html=True)
 
     # カスタム祝日の管理UI
     with st.expander("カスタム祝日の管理"):
-        custom_holidays = db.get_custom_holidays(selected_year, selected_month)
+        custom_holidays = sorted(calendar.custom_holidays)
         
         # カスタム祝日の追加
         col1, col2 = st.columns(2)
@@ -153,119 +355,60 @@ def display_shift_table(selected_year, selected_month):
         with col2:
             if st.button("祝日として追加"):
                 if db.add_custom_holiday(pd.Timestamp(new_holiday)):
-                    st.session_state.shift_data.loc[pd.Timestamp(new_holiday), :] = '休み'
+                    calendar.add_custom_holiday(new_holiday)
+                    refresh_session_row(calendar, new_holiday)
                     st.success("カスタム祝日を追加しました")
                     st.rerun()
         
         # 現在のカスタム祝日一覧
         if custom_holidays:
             st.write("現在のカスタム祝日:")
-            for holiday in sorted(custom_holidays):
+            for holiday in custom_holidays:
                 col1, col2 = st.columns([3, 1])
                 with col1:
                     st.write(f"{holiday.strftime('%Y年%m月%d日')}")
                 with col2:
                     if st.button("削除", key=f"delete_{holiday}"):
                         if db.remove_custom_holiday(holiday):
-                            holiday_date = pd.Timestamp(holiday)
-                            if (holiday_date.weekday() < 5 and  # 平日
-                                not jpholiday.is_holiday(holiday_date)):  # 通常の祝日でない
-                                st.session_state.shift_data.loc[holiday_date, :] = ''
+                            calendar.remove_custom_holiday(holiday)
+                            # 土日・通常の祝日でなくなった場合は'休み'を解除
+                            refresh_session_row(calendar, holiday)
                             st.success("カスタム祝日を削除しました")
                             st.rerun()
         else:
             st.write("カスタム祝日は設定されていません")
 
-    # ページネーション関連の設定
-    items_per_page = 15
-    total_pages = len(display_data) // items_per_page + (1 if len(display_data) % items_per_page > 0 else 0)
-    
-    if 'current_page' not in st.session_state:
-        st.session_state.current_page = 1
-
-    col1, col2, col3 = st.columns([2,3,2])
-    with col1:
-        if st.button('◀◀ 最初'):
-            st.session_state.current_page = 1
-        if st.button('◀ 前へ') and st.session_state.current_page > 1:
-            st.session_state.current_page -= 1
-    with col2:
-        st.write(f'ページ {st.session_state.current_page} / {total_pages}')
-    with col3:
-        if st.button('最後 ▶▶'):
-            st.session_state.current_page = total_pages
-        if st.button('次へ ▶') and st.session_state.current_page < total_pages:
-            st.session_state.current_page += 1
-
-    start_idx = (st.session_state.current_page - 1) * items_per_page
-    end_idx = start_idx + items_per_page
-    page_display_data = display_data.iloc[start_idx:end_idx]
-    
-    # 各行のフォーマット時に現在の日付情報を保存
-    styled_rows = []
-    for idx, row in page_display_data.iterrows():
-        # 現在の日付をセッションステートに保存
-        st.session_state.current_date = idx
-        # 行のスタイリングを適用
-        styled_rows.append(row)
-    
-    page_display_data = pd.DataFrame(styled_rows)
-    page_display_data = page_display_data.reset_index(drop=True)
-
-    def style_val(val, row):
-        if pd.isna(val) or val not in ['休み', '有給']:
-            return format_shifts(val)
-            
-        weekday = row['曜日']
-        date = pd.to_datetime(row['日付'])
-        
-        is_holiday = weekday == '日' or date in custom_holidays or jpholiday.is_holiday(date)
-        is_saturday = weekday == '土'
-        
-        if is_holiday:
-            text_color = HOLIDAY_BG_COLOR2  # 日曜・祝日は赤色
-            bg_color = HOLIDAY_BG_COLOR
-        elif is_saturday:
-            text_color = SATURDAY_BG_COLOR2  # 土曜は青色
-            bg_color = SATURDAY_BG_COLOR
-        else:
-            text_color = "#373737"  # 平日はデフォルトの色
-            bg_color = HOLIDAY_BG_COLOR
-            
-        return f'<div style="display: flex; align-items: center; justify-content: center;"><span style="color: {text_color}; background-color: {bg_color}; padding: 4px 8px; border-radius: 4px; display: inline-block;">{val}</span></div>'
-
-    # スタイルを適用
-    employees = get_active_employees()
-    for emp in employees:
-        styled_rows = []
-        for idx, row in page_display_data.iterrows():
-            styled_val = style_val(row[emp], row)
-            styled_rows.append(styled_val)
-        page_display_data[emp] = styled_rows
-
-    # スタイリングにカスタム祝日を反映
-    styled_df = page_display_data.style.apply(
-        lambda row: highlight_weekend_and_holiday(row, custom_holidays),
-        axis=1
-    )
-    
-    st.write(styled_df.hide(axis="index").to_html(escape=False), unsafe_allow_html=True)
+    # 表示中のページの行だけを書式設定する
+    start_idx, end_idx = paginate_rows(len(shift_data))
+    with timing('shift_table_html'):
+        page_display_data, day_classes = render_grid_page(shift_data, calendar, employees, start_idx, end_idx)
+        # 行の背景色は CSS クラスで指定し、表全体を1つの文字列として組み立てる
+        table_html = build_table_html(page_display_data, row_classes=day_classes)
+    st.write(table_html, unsafe_allow_html=True)
     st.markdown("### シフト日数")
-    shift_counts = calculate_shift_count(display_data[employees])
-    shift_count_df = pd.DataFrame([shift_counts], columns=employees)
-    styled_shift_count = shift_count_df.style.format("{:.1f}")\
-                                           .set_properties(**{'class': 'shift-count'})
-    st.write(styled_shift_count.hide(axis="index").to_html(escape=False), unsafe_allow_html=True)
+    shift_counts = calculate_shift_count(shift_data)
+    shift_count_df = pd.DataFrame([shift_counts.map('{:.1f}'.format)], columns=employees)
+    st.write(build_table_html(shift_count_df, cell_class='shift-count'), unsafe_allow_html=True)
+
+    with st.expander("シフト内訳（種類別・店舗別）"):
+        st.write("種類別")
+        st.dataframe(count_by_shift_type(shift_data))
+        store_counts = count_by_store(shift_data)
+        store_counts = store_counts.loc[:, store_counts.sum() > 0]
+        if not store_counts.empty:
+            st.write("店舗別")
+            st.dataframe(store_counts)
 
     # Add work days display
-    work_days = db.get_work_days(selected_year, selected_month)
     if work_days is not None:
         st.markdown(f"### {start_date.strftime('%Y年%m月%d日')}～{end_date.strftime('%Y年%m月%d日')}の必要日数")
         st.markdown(f"<h2 style='text-align: left; color: #1E88E5; font-size: 28px;'><strong>{work_days}</strong> 日</h2>", unsafe_allow_html=True)
 
     # ヘルプ表PDFのダウンロードボタンを追加
     if st.button('ヘルプ表をPDFでダウンロード'):
-        pdf = generate_help_table_pdf(display_data, selected_year, selected_month, custom_holidays)
+        with timing('generate_help_table_pdf'):
+            pdf = generate_help_table_pdf(with_date_columns(shift_data, calendar), selected_year, selected_month,
+                                          calendar, work_days)
         st.download_button(
             label="ヘルプ表PDFをダウンロード",
             data=pdf,
@@ -273,6 +416,121 @@ def display_shift_table(selected_year, selected_month):
             mime="application/pdf"
         )
 
+def display_store_coverage(selected_year, selected_month, employees):
+    """店舗 × 日付 の担当状況（エリアごと）と未配置の日の一覧"""
+    calendar = get_period_calendar(selected_year, selected_month)
+    coverage = get_store_coverage()
+
+    col1, col2 = st.columns([2, 3])
+    with col1:
+        area = st.selectbox('エリアを選択', [name for name, stores in AREAS.items() if stores], key='coverage_area')
+    with col2:
+        skip_days_off = st.checkbox('土日祝は未配置として扱わない', value=True, key='coverage_skip_days_off')
+    stores = AREAS[area]
+
+    # 索引は期間ごとに作成済みのため、ここでは参照するだけ
+    coverage_data = coverage.coverage_frame(calendar.dates, stores, employees)
+    ignored = calendar.day_off_mask if skip_days_off else np.zeros(len(calendar.dates), dtype=bool)
+
+    display_data = pd.DataFrame({
+        '日付': calendar.dates.strftime('%Y-%m-%d'),
+        '曜日': calendar.weekday_labels,
+    })
+    for store in stores:
+        display_data[store] = [
+            '' if not cell and skip else render_coverage_cell(cell)
+            for cell, skip in zip(coverage_data[store], ignored)
+        ]
+    st.write(build_table_html(display_data, row_classes=calendar.display_classes(),
+                              header_classes=STORE_CLASSES), unsafe_allow_html=True)
+
+    # 未配置の日の一覧
+    working_dates = calendar.dates[~ignored]
+    gaps = coverage.gaps(working_dates, stores)
+    gap_rows = [
+        (store, len(dates), ', '.join(d.strftime('%m/%d') for d in dates))
+        for store, dates in gaps.items() if dates
+    ]
+    st.markdown("### 未配置の日")
+    if gap_rows:
+        st.dataframe(pd.DataFrame(gap_rows, columns=['店舗', '日数', '日付']), hide_index=True)
+    else:
+        st.write("すべての日に担当者がいます")
+
+    if st.button('店舗別担当表をPDFでダウンロード'):
+        with timing('generate_store_coverage_pdf'):
+            pdf = generate_store_coverage_pdf(coverage_data, area, selected_year, selected_month, calendar,
+                                              skip_days_off)
+        st.download_button(
+            label="店舗別担当表PDFをダウンロード",
+            data=pdf,
+            file_name=f"かごしま北_店舗別_{area}_{selected_year}_{selected_month}.pdf",
+            mime="application/pdf"
+        )
+
+def display_range_review():
+    """連続した複数期間のシフトをまとめて確認する（閲覧専用）"""
+    st.header("期間まとめて確認")
+
+    current_year = datetime.now().year
+    years = range(current_year - 1, current_year + 10)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        year = st.selectbox('開始年', years, index=years.index(current_year), key='review_year')
+    with col2:
+        month = st.selectbox('開始月', range(1, 13), key='review_month')
+    with col3:
+        periods = st.number_input('期間数', min_value=1, max_value=12, value=3, key='review_periods')
+
+    # 全期間を1回の読み込みで取得し、1つの日付インデックスの表にする
+    employees = get_active_employees()
+    range_start = period_bounds(year, month)[0]
+    range_end = period_bounds(*period_range(year, month, periods)[-1])[1]
+    calendar = PeriodCalendar(year, month, db.get_custom_holidays_between(range_start, range_end), periods)
+    shift_data = build_shift_frame(calendar, employees, get_shift_cache().get_range(year, month, periods))
+
+    # 期間ごとのシフト日数（表示用の切り出しは選択した期間だけ行う）
+    slices = calendar.period_slices()
+    counts = pd.DataFrame(
+        [calculate_shift_count(shift_data.loc[start_date:end_date]) for _, _, start_date, end_date in slices],
+        index=[f'{y}年{m}月' for y, m, _, _ in slices],
+        columns=employees
+    )
+    counts.loc['合計'] = counts.sum()
+    st.markdown(f"### {calendar.label} のシフト日数")
+    st.dataframe(counts)
+
+    labels = ['全期間'] + [f'{y}年{m}月' for y, m, _, _ in slices]
+    selected = st.selectbox('表示する期間', labels, key='review_period')
+    if selected == '全期間':
+        view_start, view_end = calendar.start_date, calendar.end_date
+    else:
+        _, _, view_start, view_end = slices[labels.index(selected) - 1]
+
+    view = shift_data.loc[view_start:view_end]
+    start_idx, end_idx = paginate_rows(len(view), state_key='review_page')
+    display_data, day_classes = render_grid_page(view, calendar, employees, start_idx, end_idx)
+
+    st.markdown(f"<style>{shift_table_css()}</style>", unsafe_allow_html=True)
+    st.write(build_table_html(display_data, row_classes=day_classes), unsafe_allow_html=True)
+
+def reset_roster_page():
+    st.session_state.roster_page = 1
+
+def set_pending_active(emp_id, saved_active):
+    """有効・無効の切り替えを保存待ちとして記録する（ページを移動しても保持する）"""
+    active = st.session_state[f"active_{emp_id}"]
+    pending = st.session_state.setdefault('roster_pending', {})
+    if active == saved_active:
+        pending.pop(emp_id, None)
+    else:
+        pending[emp_id] = active
+
+def clear_pending_active():
+    """保存待ちの切り替えを破棄し、トグルを保存済みの状態に戻す"""
+    for emp_id in st.session_state.pop('roster_pending', {}):
+        st.session_state.pop(f"active_{emp_id}", None)
+
 def display_employee_management():
     st.header("スタッフ管理")
     
@@ -286,87 +544,129 @@ def display_employee_management():
             
         if add_clicked and new_name:
             if db.add_employee(new_name):
+                invalidate_roster()
                 st.success(f"{new_name}を追加しました")
                 st.rerun()
             else:
                 st.error("スタッフの追加に失敗しました")
 
-    # スタッフ一覧と管理
-    employees = db.get_all_employees()
-    if employees:
-        st.write("### 現在のスタッフ一覧")
+    # スタッフ一覧は検索条件に合うものを1ページ分だけ読み込む
+    search = st.text_input("名前で検索", key="roster_search", on_change=reset_roster_page).strip()
+    page_size = st.session_state.get('roster_page_size', DEFAULT_ROSTER_PAGE_SIZE)
+    offset = (st.session_state.get('roster_page', 1) - 1) * page_size
+    roster = load_roster_page(search, offset, page_size)
+    if roster is None:
+        # エラーは get_employees_page で表示済み
+        return
+    employees, total = roster
+
+    if not total:
+        st.info("該当するスタッフがいません" if search else "スタッフが登録されていません")
+        return
+
+    st.write(f"### 現在のスタッフ一覧（{total} 人）")
+    start_idx, end_idx = paginate_rows(total, 'roster_page', ROSTER_PAGE_SIZE_OPTIONS,
+                                       DEFAULT_ROSTER_PAGE_SIZE, '1ページの表示人数')
+    if (start_idx, end_idx) != (offset, offset + page_size):
+        # ページ送りのボタンなどでページが変わった場合は読み込み直す
+        offset, page_size = start_idx, end_idx - start_idx
+        roster = load_roster_page(search, offset, page_size)
+        if roster is None:
+            return
+        employees, total = roster
+    first = 1 if offset > 0 else 0
+    page_employees = employees[first:first + page_size]
+
+    if search:
+        st.write("検索中は表示順序を変更できません")
+    else:
         st.write("↑↓ボタンで表示順序を変更できます")
-        
-        # スタッフ一覧を表として表示
-        for i, emp in enumerate(employees):
-            with st.container():
-                col1, col2, col3, col4, col5 = st.columns([1, 3, 2, 1, 1])
-                
-                with col1:
-                    st.write(f"{emp['display_order']}.")
-                
-                with col2:
-                    st.write(f"{emp['name']}")
-                
-                with col3:
-                    active = st.toggle('有効', value=emp['is_active'], key=f"active_{emp['id']}")
-                    if active != emp['is_active']:
-                        if db.update_employee(emp['id'], is_active=active):
-                            st.success("状態を更新しました")
+
+    # 有効・無効の切り替えは保存待ちとして記録し、まとめて保存する
+    pending = st.session_state.setdefault('roster_pending', {})
+    for i, emp in enumerate(page_employees, first):
+        with st.container():
+            col1, col2, col3, col4, col5 = st.columns([1, 3, 2, 1, 1])
+            
+            with col1:
+                st.write(f"{emp['display_order']}.")
+            
+            with col2:
+                st.write(f"{emp['name']}")
+            
+            with col3:
+                st.toggle('有効', value=pending.get(emp['id'], emp['is_active']), key=f"active_{emp['id']}",
+                          on_change=set_pending_active, args=(emp['id'], emp['is_active']))
+            
+            with col4:
+                # 上下移動ボタンを縦に配置
+                if not search and i > 0:
+                    if st.button("↑", key=f"up_{emp['id']}", help="上に移動"):
+                        prev_emp = employees[i-1]
+                        if db.reorder_employees([
+                            (emp['id'], prev_emp['display_order']),
+                            (prev_emp['id'], emp['display_order'])
+                        ]):
+                            invalidate_roster()
                             st.rerun()
                 
-                with col4:
-                    # 上下移動ボタンを縦に配置
-                    if i > 0:
-                        if st.button("↑", key=f"up_{emp['id']}", help="上に移動"):
-                            prev_emp = employees[i-1]
-                            if db.reorder_employees([
-                                (emp['id'], prev_emp['display_order']),
-                                (prev_emp['id'], emp['display_order'])
-                            ]):
-                                st.rerun()
+                if not search and i < len(employees)-1:
+                    if st.button("↓", key=f"down_{emp['id']}", help="下に移動"):
+                        next_emp = employees[i+1]
+                        if db.reorder_employees([
+                            (emp['id'], next_emp['display_order']),
+                            (next_emp['id'], emp['display_order'])
+                        ]):
+                            invalidate_roster()
+                            st.rerun()
+            
+            with col5:
+                # 削除ボタン
+                if st.button("🗑️", key=f"delete_{emp['id']}", help="削除"):
+                    # 削除確認用のモーダル
+                    if 'delete_confirm' not in st.session_state:
+                        st.session_state.delete_confirm = False
                     
-                    if i < len(employees)-1:
-                        if st.button("↓", key=f"down_{emp['id']}", help="下に移動"):
-                            next_emp = employees[i+1]
-                            if db.reorder_employees([
-                                (emp['id'], next_emp['display_order']),
-                                (next_emp['id'], emp['display_order'])
-                            ]):
-                                st.rerun()
-                
-                with col5:
-                    # 削除ボタン
-                    if st.button("🗑️", key=f"delete_{emp['id']}", help="削除"):
-                        # 削除確認用のモーダル
-                        if 'delete_confirm' not in st.session_state:
-                            st.session_state.delete_confirm = False
-                        
-                        st.session_state.delete_confirm = True
-                        st.session_state.delete_target = emp
-                
-                # 区切り線を追加
-                st.divider()
+                    st.session_state.delete_confirm = True
+                    st.session_state.delete_target = emp
+            
+            # 区切り線を追加
+            st.divider()
 
-        # 削除確認モーダル
-        if getattr(st.session_state, 'delete_confirm', False):
-            emp = st.session_state.delete_target
-            st.warning(f"⚠️ {emp['name']}を削除してもよろしいですか？")
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("はい、削除します"):
-                    if db.delete_employee(emp['id']):
-                        st.success(f"{emp['name']}を削除しました")
-                        del st.session_state.delete_confirm
-                        del st.session_state.delete_target
-                        st.rerun()
-            with col2:
-                if st.button("キャンセル"):
+    if pending:
+        st.write(f"有効・無効の未保存の変更: {len(pending)} 件（他のページの変更を含む）")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("変更を保存", type="primary"):
+                if db.set_employees_active(list(pending.items())):
+                    clear_pending_active()
+                    invalidate_roster()
+                    st.success("状態を更新しました")
+                    st.rerun()
+        with col2:
+            if st.button("変更を取り消す"):
+                clear_pending_active()
+                st.rerun()
+
+    # 削除確認モーダル
+    if getattr(st.session_state, 'delete_confirm', False):
+        emp = st.session_state.delete_target
+        st.warning(f"⚠️ {emp['name']}を削除してもよろしいですか？")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("はい、削除します"):
+                if db.delete_employee(emp['id']):
+                    st.session_state.roster_pending.pop(emp['id'], None)
+                    invalidate_roster()
+                    st.success(f"{emp['name']}を削除しました")
                     del st.session_state.delete_confirm
                     del st.session_state.delete_target
                     st.rerun()
-    else:
-        st.info("スタッフが登録されていません")
+        with col2:
+            if st.button("キャンセル"):
+                del st.session_state.delete_confirm
+                del st.session_state.delete_target
+                st.rerun()
 
 def initialize_session_state():
     if 'editing_shift' not in st.session_state:
@@ -420,7 +720,7 @@ def update_shift_input(current_shift):
                 new_stores.append(store)
         
         if new_times and new_stores:
-            new_shift_str = f"{new_shift_type},{','.join([f'{t}@{s}' for t, s in zip(new_times, new_stores)])}"
+            new_shift_str = encode_shift(Shift.from_parts(new_shift_type, new_times, new_stores))
         else:
             new_shift_str = new_shift_type
     else:
@@ -482,13 +782,14 @@ def update_shift_input(current_shift):
     return new_shift_str, repeat_weekly, selected_dates, save_clicked, clear_clicked
 
 def main():
+    db.begin_request()
     st.title('かごしま北シフト管理📝')
 
     # サイドバーにタブを追加
     with st.sidebar:
         selected_tab = st.radio(
             "メニュー",
-            ["シフト管理", "スタッフ管理"],
+            ["シフト管理", "期間まとめて確認", "スタッフ管理"],
             key="sidebar_tab"
         )
 
@@ -501,22 +802,39 @@ def main():
             selected_year = st.selectbox('年を選択', years, index=current_year_index, key='year_selector')
             selected_month = st.selectbox('月を選択', range(1, 13), key='month_selector')
 
+            # 画面に必要なデータをまとめて並行に読み込む
+            page = load_shift_page(selected_year, selected_month)
+
+            write_queue = get_write_behind_queue()
+            write_behind = st.toggle('保存を後回しにする（高速保存）', key='write_behind',
+                                     help='保存内容をすぐに画面へ反映し、データベースへはバックグラウンドで書き込みます')
+            queue_stats = write_queue.stats()
+            unsaved = queue_stats['pending'] + queue_stats['in_flight']
+            if write_behind or unsaved or queue_stats['failed']:
+                st.caption(f"未保存: {unsaved} 件 / 保存失敗: {queue_stats['failed']} 件")
+            if queue_stats['failed']:
+                if st.button('保存に失敗したシフトを再送'):
+                    write_queue.retry_failed()
+                    st.rerun()
+
             # Add work days registration section
             st.header('月間労働日数の登録')
             work_days = st.number_input('労働日数を記入', min_value=0, max_value=31, 
-                                      value=db.get_work_days(selected_year, selected_month) or 0)
+                                      value=page.work_days or 0)
             if st.button('労働日数を保存'):
-                if db.save_work_days(selected_year, selected_month, work_days):
+                stored = db.save_work_days(selected_year, selected_month, work_days)
+                if stored:
+                    # 保存後の値をこの実行の読み込み結果として使う
+                    page = page._replace(work_days=stored['days'])
+                    db.prime_request_memo('get_work_days', (selected_year, selected_month), stored['days'])
                     st.success('労働日数を保存しました')
                 else:
                     st.error('労働日数の保存に失敗しました')
 
-            initialize_shift_data(selected_year, selected_month)
-            shifts = get_cached_shifts(selected_year, selected_month)
-            update_session_state_shifts(shifts)
+            initialize_shift_data(selected_year, selected_month, page.employees, page.changes)
 
             st.header('シフト登録/修正')
-            employees = get_active_employees()
+            employees = page.employees
             employee = st.selectbox('従業員を選択', employees)
             
             start_date = datetime(selected_year, selected_month, 16)
@@ -535,60 +853,116 @@ def main():
                 action_text = 'シフト取り消し' if clear_clicked else '保存'
                 try:
                     with st.spinner(f'{action_text}中...'):
-                        if not repeat_weekly:
-                            save_result = db.save_shift(date, employee, new_shift_str)
-                        else:
+                        target_dates = selected_dates if repeat_weekly else [date]
+                        if write_behind:
+                            # ジャーナルに記録した時点で受け付け、保存はバックグラウンドで行う
+                            write_queue.enqueue([(d, employee, new_shift_str) for d in target_dates])
+                            saved_dates = []
+                            failed_dates = []
+                            for queued_date in target_dates:
+                                if queued_date in st.session_state.shift_data.index:
+                                    set_session_shift(queued_date, employee, new_shift_str)
                             save_result = True
-                            for target_date in selected_dates:
-                                result = db.save_shift(target_date, employee, new_shift_str)
-                                save_result = save_result and result
+                        elif not repeat_weekly:
+                            stored = db.save_shift(date, employee, new_shift_str)
+                            save_result = bool(stored)
+                            if stored:
+                                # 保存後の行で画面とキャッシュを更新する（読み直さない）
+                                new_shift_str = stored['shift'] if stored['shift'] is not None else '-'
+                            saved_dates = [date] if save_result else []
+                            failed_dates = [] if save_result else [date]
+                        else:
+                            # 繰り返し登録は一括保存で処理する
+                            failed = db.save_shifts_bulk(
+                                [(target_date, employee, new_shift_str) for target_date in selected_dates]
+                            )
+                            failed_dates = sorted({failed_date for failed_date, _, _ in failed})
+                            saved_dates = [d for d in selected_dates if d not in failed_dates]
+                            save_result = not failed_dates
+
+                        # 保存できた日付だけ画面に反映する
+                        for saved_date in saved_dates:
+                            if saved_date in st.session_state.shift_data.index:
+                                set_session_shift(saved_date, employee, new_shift_str)
+
+                        # 保存できたセルだけキャッシュに反映し、失敗した日付の期間は破棄する
+                        shift_cache = get_shift_cache()
+                        shift_cache.write_through([(d, employee, new_shift_str) for d in saved_dates])
+                        shift_cache.invalidate_dates(failed_dates)
                         
                         if save_result:
-                            st.session_state.shift_data.loc[date, employee] = new_shift_str
-                            if repeat_weekly and selected_dates:
-                                for next_date in selected_dates:
-                                    if next_date in st.session_state.shift_data.index:
-                                        st.session_state.shift_data.loc[next_date, employee] = new_shift_str
                             st.session_state.editing_shift = False
                             st.success(f'{action_text}しました')
-                            
-                            # キャッシュをクリアして再読み込み
-                            current_month = date.replace(day=1)
-                            next_month = current_month + pd.DateOffset(months=1)
-                            previous_month = current_month - pd.DateOffset(months=1)
-                            get_cached_shifts.clear()
-                            get_cached_shifts(current_month.year, current_month.month)
-                            get_cached_shifts(next_month.year, next_month.month)
-                            get_cached_shifts(previous_month.year, previous_month.month)
-                            
                             st.rerun()
                         else:
-                            st.error(f'{action_text}に失敗しました')
+                            if repeat_weekly:
+                                failed_text = ', '.join(d.strftime('%m/%d') for d in failed_dates)
+                                st.error(f'次の日付の{action_text}に失敗しました: {failed_text}')
+                            else:
+                                st.error(f'{action_text}に失敗しました')
                 except Exception as e:
                     st.error(f'{action_text}中にエラーが発生しました: {str(e)}')
 
             st.header('個別PDFのダウンロード')
             selected_employee = st.selectbox('従業員を選択', employees, key='pdf_employee_selector')
             
+            calendar = get_period_calendar(selected_year, selected_month)
             if st.button('PDFを生成'):
                 employee_data = st.session_state.shift_data[selected_employee]
-                pdf_buffer = generate_individual_pdf(employee_data, selected_employee, selected_year, selected_month)
-                start_date = pd.Timestamp(selected_year, selected_month, 16)
-                end_date = start_date + pd.DateOffset(months=1) - pd.Timedelta(days=1)
-                file_name = f'{selected_employee}さん_{start_date.strftime("%Y年%m月%d日")}～{end_date.strftime("%Y年%m月%d日")}_シフト.pdf'
+                with timing('generate_individual_pdf'):
+                    pdf_buffer = generate_individual_pdf(employee_data, selected_employee, selected_year,
+                                                         selected_month, calendar)
                 st.download_button(
                     label=f"{selected_employee}さんのPDFをダウンロード",
                     data=pdf_buffer.getvalue(),
-                    file_name=file_name,
+                    file_name=individual_pdf_file_name(selected_employee, calendar),
                     mime="application/pdf"
                 )
 
-        display_shift_table(selected_year, selected_month)
+            if st.button('全スタッフのPDFを一括生成'):
+                with st.spinner('PDFを生成中...'):
+                    started = time.perf_counter()
+                    with timing('export_individual_pdfs_zip'):
+                        zip_bytes, timings = export_all_individual_pdfs(
+                            st.session_state.shift_data, employees, selected_year, selected_month, calendar
+                        )
+                    total_seconds = time.perf_counter() - started
+                st.download_button(
+                    label="全スタッフのPDF（ZIP）をダウンロード",
+                    data=zip_bytes,
+                    file_name=f"かごしま北_個別シフト_{selected_year}_{selected_month}.zip",
+                    mime="application/zip"
+                )
+                # 従業員ごとの生成時間
+                st.caption(f"合計 {total_seconds:.2f} 秒")
+                st.dataframe(
+                    pd.DataFrame(
+                        [(emp, round(seconds * 1000)) for emp, seconds in timings.items()],
+                        columns=['従業員', '生成時間 (ms)']
+                    ).sort_values('生成時間 (ms)', ascending=False),
+                    hide_index=True
+                )
+
+        staff_tab, store_tab = st.tabs(["スタッフ別", "店舗別"])
+        with staff_tab:
+            display_shift_table(selected_year, selected_month, page.employees, page.work_days)
+        with store_tab:
+            display_store_coverage(selected_year, selected_month, page.employees)
+    elif selected_tab == "期間まとめて確認":
+        display_range_review()
     else:
         display_employee_management()
 
 if __name__ == '__main__':
-    if db.init_db():
-        main()
-    else:
-        st.error("データベース接続に失敗しました")
\ No newline at end of file
+    begin_rerun()
+    try:
+        if db.init_db():
+            main()
+        else:
+            st.error("データベース接続に失敗しました")
+    finally:
+        # st.rerun() で中断した実行も含めて処理時間を記録する
+        summary = end_rerun(tab=st.session_state.get('sidebar_tab'))
+    # ?debug=1 のときは、この実行の処理時間・読み込み回数とシフトキャッシュの利用状況をサイドバーに表示する
+    if st.query_params.get('debug'):
+        render_debug_panel(summary, db.request_stats(), get_shift_cache().stats())
\ No newline at end of file
@@ -4,139 +4,74 @@ from reportlab.lib import colors
 from reportlab.lib.colors import HexColor
 from reportlab.lib.pagesizes import landscape, A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import mm
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.enums import TA_CENTER
 from constants import (
-    HOLIDAY_BG_COLOR, KAGOKITA_BG_COLOR, WEEKDAY_JA, SATURDAY_BG_COLOR,
-    RECRUIT_BG_COLOR, SATURDAY_BG_COLOR2, SUNDAY_BG_COLOR2, HOLIDAY_BG_COLOR2,
-    STORE_COLORS
+    HOLIDAY_BG_COLOR, KAGOKITA_BG_COLOR, SATURDAY_BG_COLOR,
+    RECRUIT_BG_COLOR, STORE_COLORS, DAY_OFF_COLORS, COVERAGE_GAP_BG_COLOR
 )
-import jpholiday
-
-def calculate_shift_count(data, employee=None):
-    """シフト日数を計算する関数"""
-    def count_shift(shift):
-        if pd.isna(shift) or shift == '休み':
-            return 0
-        return 1  # 「休み」以外は全てカウント（ハイフンを含む）
-
-    if employee:
-        # 個別従業員のシフト日数を計算
-        return sum(count_shift(shift) for shift in data)
-    else:
-        # 全従業員のシフト日数を計算
-        counts = {}
-        for emp in data.columns:
-            if emp not in ['日付', '曜日']:
-                counts[emp] = sum(count_shift(shift) for shift in data[emp])
-        return counts
+from pdf_styles import help_table_styles, individual_styles, background_style
+from period_calendar import PeriodCalendar
+from shift_codec import Shift, decode_shift
+from shift_counter import calculate_shift_count
 
-def count_shift(shift):
-    if pd.isna(shift) or shift == '休み':
-        return 0
-    return 1  # 「休み」以外は全てカウント（ハイフンを含む）
-
-def get_shift_paragraph(shift, row, bold_style, custom_holidays=None):
+def get_shift_paragraph(shift, row, bold_style, calendar):
     """シフトのパラグラフスタイルを決定する補助関数"""
-    if custom_holidays is None:
-        custom_holidays = []
-        
     if pd.isna(shift) or shift == '' or shift == '-':
         return Paragraph('', bold_style)
         
-    shift_parts = str(shift).split(',')
-    shift_type = shift_parts[0]
+    try:
+        parsed = decode_shift(str(shift))
+    except ValueError:
+        return Paragraph(f'<b>{shift}</b>', bold_style)
+    shift_type = parsed.shift_type
     
     if shift_type in ['休み', '有給']:
-        date = pd.to_datetime(row['日付'])
-        is_holiday = row['曜日'] == '日' or date in custom_holidays or jpholiday.is_holiday(date)
-        is_saturday = row['曜日'] == '土'
-        
-        if is_holiday:
-            text_color = HOLIDAY_BG_COLOR2
-            bg_color = HOLIDAY_BG_COLOR
-        elif is_saturday:
-            text_color = SATURDAY_BG_COLOR2
-            bg_color = SATURDAY_BG_COLOR
-        else:
-            text_color = "#373737"
-            bg_color = HOLIDAY_BG_COLOR
-            
+        text_color, bg_color = DAY_OFF_COLORS[calendar.display_class(row['日付'])]
         return Paragraph(f'<font color="{text_color}"><b>{shift_type}</b></font>', 
-                        ParagraphStyle('Holiday', parent=bold_style, backColor=colors.HexColor(bg_color)))
+                        background_style(bold_style, bg_color))
     
     if shift_type == 'かご北':
         return Paragraph(f'<b>{shift_type}</b>', 
-                        ParagraphStyle('Store', parent=bold_style, 
-                                     textColor=colors.HexColor("#373737"),
-                                     backColor=colors.HexColor(KAGOKITA_BG_COLOR)))
+                        background_style(bold_style, KAGOKITA_BG_COLOR, "#373737"))
     elif shift_type == 'リクルート':
         return Paragraph(f'<b>{shift_type}</b>', 
-                        ParagraphStyle('Store', parent=bold_style, 
-                                     textColor=colors.HexColor("#373737"),
-                                     backColor=colors.HexColor(RECRUIT_BG_COLOR)))
+                        background_style(bold_style, RECRUIT_BG_COLOR, "#373737"))
     
     formatted_parts = []
     formatted_parts.append(Paragraph(f'<b>{shift_type}</b>', bold_style))
     
-    for part in shift_parts[1:]:
-        if '@' in part:
-            time, store = part.split('@')
+    for time, store in parsed.entries:
+        if store is not None:
             store_color = STORE_COLORS.get(store, "#373737")
             formatted_parts.append(
                 Paragraph(f'<font color="{store_color}"><b>{time}@{store}</b></font>', bold_style)
             )
         else:
-            formatted_parts.append(Paragraph(f'<b>{part}</b>', bold_style))
+            formatted_parts.append(Paragraph(f'<b>{time}</b>', bold_style))
     
     return formatted_parts
 
-def generate_help_table_pdf(data, year, month, custom_holidays=None):
-    """ヘルプ表PDFを生成する関数"""
-    if custom_holidays is None:
-        custom_holidays = []
+def generate_help_table_pdf(data, year, month, calendar=None, work_days=None):
+    """ヘルプ表PDFを生成する関数
+
+    work_days は必要日数（None の場合は必要日数の行を出力しない）。
+    """
+    if calendar is None:
+        calendar = PeriodCalendar(year, month)
         
     buffer = io.BytesIO()
     custom_page_size = (landscape(A4)[0] * 1.2, landscape(A4)[1] * 1.15)
     doc = SimpleDocTemplate(buffer, pagesize=custom_page_size, rightMargin=5*mm, leftMargin=5*mm, topMargin=8*mm, bottomMargin=8*mm)
 
-    # 初期化とスタイル設定
+    # 初期化とスタイル設定（フォントとスタイルはプロセス内で共有）
     elements = []
-    pdfmetrics.registerFont(TTFont('NotoSansJP', 'NotoSansJP-VariableFont_wght.ttf'))
-    pdfmetrics.registerFont(TTFont('NotoSansJP-Bold', 'NotoSansJP-Bold.ttf'))
-
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontName='NotoSansJP-Bold',
-        fontSize=16,
-        textColor=colors.HexColor("#373737")
-    )
-    bold_style = ParagraphStyle(
-        'Bold',
-        parent=styles['Normal'],
-        fontSize=9,
-        fontName='NotoSansJP-Bold',
-        alignment=TA_CENTER,
-        textColor=colors.HexColor("#373737")
-    )
-    header_style = ParagraphStyle(
-        'Header',
-        parent=styles['Normal'],
-        fontName='NotoSansJP-Bold',
-        fontSize=9,
-        alignment=TA_CENTER,
-        textColor=colors.white
-    )
-
-    # 日付範囲の設定
-    start_date = pd.Timestamp(year, month, 16)
-    next_month = start_date + pd.DateOffset(months=1)
-    end_date = next_month.replace(day=15)
+    styles = help_table_styles()
+    title_style = styles['title']
+    bold_style = styles['bold']
+    header_style = styles['header']
+
+    # 日付範囲の設定（複数期間の日付区分表にも対応）
+    start_date, end_date = calendar.start_date, calendar.end_date
 
     # タイトルの追加
     title = Paragraph(f"{start_date.strftime('%Y年%m月%d日')}～{end_date.strftime('%Y年%m月%d日')} ヘルプ表", title_style)
@@ -144,7 +79,7 @@ def generate_help_table_pdf(data, year, month, custom_holidays=None):
     elements.append(Spacer(1, 3*mm))
 
     # シフト日数の計算
-    shift_counts = calculate_shift_count(data)
+    shift_counts = calculate_shift_count(data.drop(columns=['日付', '曜日']))
 
     # テーブルヘッダーの作成
     table_data = [
@@ -165,7 +100,7 @@ def generate_help_table_pdf(data, year, month, custom_holidays=None):
         for emp in data.columns:
             if emp not in ['日付', '曜日']:
                 shift = row[emp]
-                formatted_shift = get_shift_paragraph(shift, row, bold_style, custom_holidays)
+                formatted_shift = get_shift_paragraph(shift, row, bold_style, calendar)
                 if isinstance(formatted_shift, list):
                     table_row.append(formatted_shift)
                 else:
@@ -179,14 +114,10 @@ def generate_help_table_pdf(data, year, month, custom_holidays=None):
                                   for emp in data.columns if emp not in ['日付', '曜日']]
     table_data.append(count_row)
 
-    # 必要日数を取得
-    work_days = None
-    try:
-        from database import db
-        work_days = db.get_work_days(year, month)
-    except Exception as e:
-        print(f"必要日数の取得に失敗しました: {e}")
-    
+    # 必要日数は期間ごとに登録されているため、1期間分の表のみ出力する
+    if calendar.periods != 1:
+        work_days = None
+
     # 必要日数行を追加（取得できた場合のみ）
     if work_days is not None:
         table_data.append([''] * len(table_data[0]))  # 空行
@@ -231,11 +162,11 @@ def generate_help_table_pdf(data, year, month, custom_holidays=None):
     table_style = TableStyle(style_commands)
 
     # 土日祝日の背景色を設定
-    for i, (_, row) in enumerate(data.iterrows(), start=1):
-        date = pd.to_datetime(row['日付'])
-        if row['曜日'] == '日' or date in custom_holidays or jpholiday.is_holiday(date):
+    for i, date_str in enumerate(data['日付'], start=1):
+        day_class = calendar.display_class(date_str)
+        if day_class == 'holiday':
             table_style.add('BACKGROUND', (0, i), (-1, i), colors.HexColor(HOLIDAY_BG_COLOR))
-        elif row['曜日'] == '土':
+        elif day_class == 'saturday':
             table_style.add('BACKGROUND', (0, i), (-1, i), colors.HexColor(SATURDAY_BG_COLOR))
 
     # スタイルを適用してテーブルを要素に追加
@@ -247,118 +178,155 @@ def generate_help_table_pdf(data, year, month, custom_holidays=None):
     buffer.seek(0)
     return buffer
 
-def generate_individual_pdf(data, employee, year, month, custom_holidays=None):
+def generate_store_coverage_pdf(coverage, area, year, month, calendar=None, skip_days_off=False):
+    """店舗別の担当表PDFを生成する関数
+
+    coverage は StoreCoverageIndex.coverage_frame の結果（日付 × 店舗）。
+    skip_days_off が True の場合、土日祝の未配置は強調しない。
+    """
+    if calendar is None:
+        calendar = PeriodCalendar(year, month)
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), rightMargin=5*mm, leftMargin=5*mm, topMargin=8*mm, bottomMargin=8*mm)
+
+    elements = []
+    styles = help_table_styles()
+    bold_style = styles['bold']
+    header_style = styles['header']
+
+    title = Paragraph(f"{calendar.start_date.strftime('%Y年%m月%d日')}～{calendar.end_date.strftime('%Y年%m月%d日')} "
+                      f"{area} 店舗別担当表", styles['title'])
+    elements.append(title)
+    elements.append(Spacer(1, 3*mm))
+
+    stores = list(coverage.columns)
+    table_data = [
+        [Paragraph('<b>日付</b>', header_style), Paragraph('<b>曜日</b>', header_style)] +
+        [Paragraph(f'<b>{store}</b>', header_style) for store in stores]
+    ]
+    gap_cells = []
+    for i, (date, row) in enumerate(coverage.iterrows(), start=1):
+        table_row = [
+            Paragraph(f'<b>{date.strftime("%m/%d")}</b>', bold_style),
+            Paragraph(f'<b>{calendar.weekday_label(date)}</b>', bold_style)
+        ]
+        for j, employees in enumerate(row, start=2):
+            if not employees and not (skip_days_off and calendar.is_day_off(date)):
+                gap_cells.append((j, i))
+            table_row.append(Paragraph(f'<b>{"<br/>".join(employees)}</b>', bold_style))
+        table_data.append(table_row)
+
+    available_width = landscape(A4)[0] - 10*mm
+    date_width = 18*mm
+    weekday_width = 10*mm
+    store_width = (available_width - date_width - weekday_width) / max(len(stores), 1)
+    table = Table(table_data, colWidths=[date_width, weekday_width] + [store_width] * len(stores), repeatRows=1)
+
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('LEFTPADDING', (0, 0), (-1, -1), 2),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+        ('TOPPADDING', (0, 0), (-1, -1), 2),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ])
+    # 店舗名の見出しは店舗の色で表示
+    for j, store in enumerate(stores, start=2):
+        table_style.add('BACKGROUND', (j, 0), (j, 0), colors.HexColor(STORE_COLORS.get(store, "#808080")))
+
+    # 土日祝日の背景色を設定
+    for i, date in enumerate(coverage.index, start=1):
+        day_class = calendar.display_class(date)
+        if day_class == 'holiday':
+            table_style.add('BACKGROUND', (0, i), (-1, i), colors.HexColor(HOLIDAY_BG_COLOR))
+        elif day_class == 'saturday':
+            table_style.add('BACKGROUND', (0, i), (-1, i), colors.HexColor(SATURDAY_BG_COLOR))
+
+    # 誰も入っていないセルを強調
+    for cell in gap_cells:
+        table_style.add('BACKGROUND', cell, cell, colors.HexColor(COVERAGE_GAP_BG_COLOR))
+
+    table.setStyle(table_style)
+    elements.append(table)
+
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
+
+def generate_individual_pdf(data, employee, year, month, calendar=None):
     """個別シフト表PDFを生成する関数"""
-    if custom_holidays is None:
-        custom_holidays = []
+    if calendar is None:
+        calendar = PeriodCalendar(year, month)
         
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=10*mm, leftMargin=10*mm, topMargin=10*mm, bottomMargin=10*mm)
     elements = []
 
-    pdfmetrics.registerFont(TTFont('NotoSansJP', 'NotoSansJP-VariableFont_wght.ttf'))
-    pdfmetrics.registerFont(TTFont('NotoSansJP-Bold', 'NotoSansJP-Bold.ttf'))
+    # フォントとスタイルはプロセス内で共有
+    styles = individual_styles()
+    title_style = styles['title']
+    normal_style = styles['normal']
+    bold_style = styles['bold']
 
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontName='NotoSansJP-Bold',
-        fontSize=16,
-        textColor=colors.HexColor("#373737")
-    )
-
-    normal_style = ParagraphStyle(
-        'Normal',
-        parent=styles['Normal'],
-        fontName='NotoSansJP',
-        fontSize=10,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor("#373737")
-    )
-
-    bold_style = ParagraphStyle(
-        'Bold',
-        parent=normal_style,
-        fontName='NotoSansJP-Bold',
-        fontSize=9
-    )
-
-    header_style = ParagraphStyle(
-        'Header',
-        parent=bold_style,
-        fontSize=10,
-        textColor=colors.white
-    )
-
-    # 日付範囲の設定
-    start_date = pd.Timestamp(year, month, 16)
-    next_month = start_date + pd.DateOffset(months=1)
-    end_date = next_month.replace(day=15)
+    # 日付範囲の設定（複数期間の日付区分表にも対応）
+    start_date, end_date = calendar.start_date, calendar.end_date
     
     # シフト日数を計算してタイトルに追加
     # データを日付でフィルタリング
     filtered_data = pd.DataFrame(data)
-    filtered_data.index = pd.date_range(start=start_date, end=end_date)
+    filtered_data.index = calendar.dates
     filtered_data = filtered_data.loc[start_date:end_date]
     
     # シフト日数を計算
-    shift_count = int(filtered_data.apply(lambda x: x.map(count_shift)).sum())
-    title = Paragraph(f"{employee}さん {year}年{month}月 シフト表 (シフト日数: {shift_count}日)", title_style)
+    shift_count = int(calculate_shift_count(filtered_data).sum())
+    title = Paragraph(f"{employee}さん {calendar.label} シフト表 (シフト日数: {shift_count}日)", title_style)
     elements.append(title)
     elements.append(Spacer(1, 10))
 
+    # 各日のシフトを一度だけ解析する（形式が不正なものは文字列のまま表示）
+    parsed_shifts = {}
     max_shifts = 1
-    for shift in filtered_data[employee]:
-        if pd.notna(shift) and shift != '-':
-            shift_parts = str(shift).split(',')
-            max_shifts = max(max_shifts, len(shift_parts))
+    for date, shift in filtered_data[employee].items():
+        if pd.notna(shift) and shift != '':
+            try:
+                parsed = decode_shift(str(shift))
+            except ValueError:
+                parsed = Shift(str(shift))
+            if parsed is not None:
+                parsed_shifts[date] = parsed
+                max_shifts = max(max_shifts, 1 + len(parsed.entries))
 
     col_widths = [20*mm, 15*mm] + [30*mm] * max_shifts
     table_data = [['日付', '曜日'] + [f'シフト{i+1}' for i in range(max_shifts)]]
     
     for date, row in filtered_data.iterrows():
-        weekday = WEEKDAY_JA[date.strftime('%a')]
-        shift = row[employee]
-        
-        if pd.isna(shift) or shift == '' or shift == '-':  # 空文字列のチェックを追加
+        weekday = calendar.weekday_label(date)
+        parsed = parsed_shifts.get(date)
+        if parsed is None:
             row_data = [date.strftime('%m/%d'), weekday] + [Paragraph('', normal_style)] + [''] * (max_shifts - 1)
         else:
-            shift_parts = str(shift).split(',')
-            shift_type = shift_parts[0]
+            shift_type = parsed.shift_type
             
             if shift_type in ['休み', '有給']:
-                is_holiday = weekday == '日' or date in custom_holidays or jpholiday.is_holiday(date)
-                is_saturday = weekday == '土'
-                
-                if is_holiday:
-                    text_color = HOLIDAY_BG_COLOR2
-                    bg_color = HOLIDAY_BG_COLOR
-                elif is_saturday:
-                    text_color = SATURDAY_BG_COLOR2
-                    bg_color = SATURDAY_BG_COLOR
-                else:
-                    text_color = "#373737"
-                    bg_color = HOLIDAY_BG_COLOR
-                    
+                text_color, bg_color = DAY_OFF_COLORS[calendar.display_class(date)]
                 shift_paragraph = Paragraph(f'<font color="{text_color}"><b>{shift_type}</b></font>', 
-                                         ParagraphStyle('Holiday', parent=bold_style, 
-                                                      backColor=colors.HexColor(bg_color)))
+                                         background_style(bold_style, bg_color))
                 row_data = [date.strftime('%m/%d'), weekday, shift_paragraph] + [''] * (max_shifts - 1)
             else:
                 formatted_shifts = []
                 formatted_shifts.append(Paragraph(f'<b>{shift_type}</b>', bold_style))
                 
-                for part in shift_parts[1:]:
-                    if '@' in part:
-                        time, store = part.split('@')
+                for time, store in parsed.entries:
+                    if store is not None:
                         store_color = STORE_COLORS.get(store, "#373737")
                         formatted_shifts.append(
                             Paragraph(f'<font color="{store_color}"><b>{time}@{store}</b></font>', bold_style)
                         )
                     else:
-                        formatted_shifts.append(Paragraph(f'<b>{part}</b>', bold_style))
+                        formatted_shifts.append(Paragraph(f'<b>{time}</b>', bold_style))
                 
                 formatted_shifts.extend([''] * (max_shifts - len(formatted_shifts)))
                 row_data = [date.strftime('%m/%d'), weekday] + formatted_shifts
@@ -386,15 +354,12 @@ def generate_individual_pdf(data, employee, year, month, custom_holidays=None):
         ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor("#e6f3ff"))  # シフト日数行の背景色
     ])
 
-    for i, row in enumerate(table_data[1:-2], start=1):  # 最後の2行（空行とシフト日数）を除外
-        try:
-            date = pd.to_datetime(filtered_data.index[i-1])
-            if '日' in row[1] or date in custom_holidays or jpholiday.is_holiday(date):
-                style.add('BACKGROUND', (0, i), (-1, i), colors.HexColor(HOLIDAY_BG_COLOR))
-            elif '土' in row[1]:
-                style.add('BACKGROUND', (0, i), (-1, i), colors.HexColor(SATURDAY_BG_COLOR))
-        except IndexError:
-            pass
+    for i, date in enumerate(filtered_data.index, start=1):
+        day_class = calendar.display_class(date)
+        if day_class == 'holiday':
+            style.add('BACKGROUND', (0, i), (-1, i), colors.HexColor(HOLIDAY_BG_COLOR))
+        elif day_class == 'saturday':
+            style.add('BACKGROUND', (0, i), (-1, i), colors.HexColor(SATURDAY_BG_COLOR))
 
     table.setStyle(style)
     elements.append(table)
@@ -0,0 +1,106 @@
+import os
+import threading
+from functools import lru_cache
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+# フォントファイルの配置ディレクトリ（環境変数 SHIFT_FONT_DIR で変更可能）
+FONT_DIR = os.environ.get('SHIFT_FONT_DIR', os.path.dirname(os.path.abspath(__file__)))
+
+FONT_FILES = {
+    'NotoSansJP': 'NotoSansJP-VariableFont_wght.ttf',
+    'NotoSansJP-Bold': 'NotoSansJP-Bold.ttf',
+}
+
+_font_lock = threading.Lock()
+
+
+def register_fonts():
+    """日本語フォントをプロセスごとに一度だけ登録する"""
+    registered = pdfmetrics.getRegisteredFontNames()
+    if all(name in registered for name in FONT_FILES):
+        return
+    with _font_lock:
+        registered = pdfmetrics.getRegisteredFontNames()
+        for name, file_name in FONT_FILES.items():
+            if name not in registered:
+                pdfmetrics.registerFont(TTFont(name, os.path.join(FONT_DIR, file_name)))
+
+
+@lru_cache(maxsize=None)
+def help_table_styles():
+    """ヘルプ表PDF用のスタイル"""
+    register_fonts()
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'Title',
+            parent=styles['Heading1'],
+            fontName='NotoSansJP-Bold',
+            fontSize=16,
+            textColor=colors.HexColor("#373737")
+        ),
+        'bold': ParagraphStyle(
+            'Bold',
+            parent=styles['Normal'],
+            fontSize=9,
+            fontName='NotoSansJP-Bold',
+            alignment=TA_CENTER,
+            textColor=colors.HexColor("#373737")
+        ),
+        'header': ParagraphStyle(
+            'Header',
+            parent=styles['Normal'],
+            fontName='NotoSansJP-Bold',
+            fontSize=9,
+            alignment=TA_CENTER,
+            textColor=colors.white
+        ),
+    }
+
+
+@lru_cache(maxsize=None)
+def individual_styles():
+    """個別シフト表PDF用のスタイル"""
+    register_fonts()
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'Title',
+        parent=styles['Heading1'],
+        fontName='NotoSansJP-Bold',
+        fontSize=16,
+        textColor=colors.HexColor("#373737")
+    )
+    normal_style = ParagraphStyle(
+        'Normal',
+        parent=styles['Normal'],
+        fontName='NotoSansJP',
+        fontSize=10,
+        alignment=TA_CENTER,
+        textColor=colors.HexColor("#373737")
+    )
+    bold_style = ParagraphStyle(
+        'Bold',
+        parent=normal_style,
+        fontName='NotoSansJP-Bold',
+        fontSize=9
+    )
+    header_style = ParagraphStyle(
+        'Header',
+        parent=bold_style,
+        fontSize=10,
+        textColor=colors.white
+    )
+    return {'title': title_style, 'normal': normal_style, 'bold': bold_style, 'header': header_style}
+
+
+@lru_cache(maxsize=None)
+def background_style(parent, bg_color, text_color=None):
+    """背景色付きのスタイル（休み・有給・かご北・リクルート用）を色ごとに共有する"""
+    options = {'backColor': colors.HexColor(bg_color)}
+    if text_color is not None:
+        options['textColor'] = colors.HexColor(text_color)
+    return ParagraphStyle(f'{parent.name}-{bg_color}', parent=parent, **options)
@@ -0,0 +1,123 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# 計測結果を追記する JSONL ファイル（未設定の場合は画面表示のみ）
+PERF_LOG_PATH = os.environ.get('SHIFT_PERF_LOG')
+
+_TRACE_KEY = '_perf_trace'
+_log_lock = threading.Lock()
+
+
+def _current_trace():
+    """現在のスクリプト実行の計測結果（スクリプト外では None）"""
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.get(_TRACE_KEY)
+
+
+def _write_log(events):
+    if not PERF_LOG_PATH or not events:
+        return
+    with _log_lock:
+        with open(PERF_LOG_PATH, 'a', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+
+def record(name, kind, seconds):
+    """1回分の処理時間を記録する
+
+    スクリプト実行中は実行ごとにまとめ、バックグラウンドのスレッドからの記録はそのままログに書き込む。
+    """
+    trace = _current_trace()
+    if trace is None:
+        _write_log([{'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+                     'session': None, 'rerun': None, 'name': name, 'kind': kind, 'seconds': seconds}])
+        return
+    trace['events'].append({'name': name, 'kind': kind, 'seconds': seconds})
+
+
+@contextmanager
+def timing(name, kind='stage'):
+    """with ブロックの処理時間を記録する"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, kind, time.perf_counter() - started)
+
+
+def timed(name=None, kind='stage'):
+    """関数の処理時間を記録するデコレータ（name を省略した場合は関数名）"""
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timing(label, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def begin_rerun():
+    """スクリプト実行の開始時に呼び出し、この実行の計測を始める"""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    previous = st.session_state.get(_TRACE_KEY)
+    st.session_state[_TRACE_KEY] = {
+        'session': ctx.session_id,
+        'rerun': previous['rerun'] + 1 if previous else 1,
+        'started': time.perf_counter(),
+        'events': [],
+    }
+
+
+def end_rerun(**fields):
+    """スクリプト実行の終了時に呼び出し、この実行の計測結果をログに書き込んで返す
+
+    fields は実行全体の記録（rerun_total）に付け加える情報（表示中のタブなど）。
+    """
+    trace = _current_trace()
+    if trace is None:
+        return None
+    total = time.perf_counter() - trace['started']
+    timestamp = datetime.now().isoformat(timespec='milliseconds')
+    events = trace['events'] + [{'name': 'rerun_total', 'kind': 'rerun', 'seconds': total, **fields}]
+    _write_log([{'timestamp': timestamp, 'session': trace['session'], 'rerun': trace['rerun'], **event}
+                for event in events])
+    return {
+        'total': total,
+        'round_trips': sum(1 for event in trace['events'] if event['kind'] == 'db'),
+        'events': trace['events'],
+    }
+
+
+def render_debug_panel(summary, request_stats=None, cache_stats=None):
+    """この実行の処理時間をサイドバーに表示する
+
+    cache_stats はシフトキャッシュのヒット数・ミス数（全セッションの累計）。
+    """
+    if summary is None:
+        return
+    with st.sidebar.expander('処理時間（この実行）', expanded=True):
+        st.caption(f"合計 {summary['total'] * 1000:.1f} ms / DB往復 {summary['round_trips']} 回")
+        if request_stats is not None:
+            st.caption(f"DB読み込み: {request_stats['queries']} 回（重複排除 {request_stats['saved']} 回）")
+        if cache_stats is not None:
+            st.caption(f"シフトキャッシュ: ヒット {cache_stats['hits']} 回 / ミス {cache_stats['misses']} 回"
+                       f"（{cache_stats['periods']} 期間を保持、全セッション累計）")
+        if summary['events']:
+            st.dataframe(
+                [{'処理': event['name'], '種類': event['kind'], '時間 (ms)': round(event['seconds'] * 1000, 1)}
+                 for event in summary['events']],
+                hide_index=True
+            )
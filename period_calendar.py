@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import jpholiday
+from constants import WEEKDAY_JA
+
+# 日付区分（day_classes の列）
+WEEKDAY, SATURDAY, SUNDAY, NATIONAL, CUSTOM = range(5)
+
+_WEEKDAY_LABELS = np.array([WEEKDAY_JA[d] for d in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']])
+
+
+def period_bounds(year, month):
+    """16日から翌月15日までの期間の開始日と終了日を返す"""
+    start_date = pd.Timestamp(year, month, 16)
+    end_date = start_date + pd.DateOffset(months=1) - pd.Timedelta(days=1)
+    return start_date, end_date
+
+
+def period_of(date):
+    """日付が属する期間の (year, month) を返す"""
+    date = pd.Timestamp(date)
+    if date.day >= 16:
+        return date.year, date.month
+    previous = date - pd.DateOffset(months=1)
+    return previous.year, previous.month
+
+
+def period_range(year, month, periods):
+    """(year, month) から始まる連続した periods 期間分の (year, month) のリスト"""
+    first = pd.Timestamp(year, month, 1)
+    return [((first + pd.DateOffset(months=i)).year, (first + pd.DateOffset(months=i)).month)
+            for i in range(periods)]
+
+
+class PeriodCalendar:
+    """土日・祝日・カスタム祝日をまとめた日付区分表
+
+    通常は1期間分（16日～翌月15日）。periods を指定すると連続した複数期間を1つの表で扱う。
+    """
+
+    def __init__(self, year, month, custom_holidays=(), periods=1):
+        self.year = year
+        self.month = month
+        self.periods = periods
+        self.start_date = period_bounds(year, month)[0]
+        self.end_date = period_bounds(*period_range(year, month, periods)[-1])[1]
+        self.dates = pd.date_range(start=self.start_date, end=self.end_date)
+
+        weekdays = self.dates.weekday.to_numpy()
+        national = [pd.Timestamp(d) for d, _ in jpholiday.between(self.start_date.date(), self.end_date.date())]
+
+        self.day_classes = np.zeros((len(self.dates), 5), dtype=bool)
+        self.day_classes[:, WEEKDAY] = weekdays < 5
+        self.day_classes[:, SATURDAY] = weekdays == 5
+        self.day_classes[:, SUNDAY] = weekdays == 6
+        self.day_classes[:, NATIONAL] = self.dates.isin(national)
+        self.weekday_labels = _WEEKDAY_LABELS[weekdays]
+
+        self.custom_holidays = set()
+        for date in custom_holidays:
+            self.add_custom_holiday(date)
+
+    @property
+    def label(self):
+        """表示用の期間名（例: 2026年1月、2026年1月～2026年12月）"""
+        if self.periods == 1:
+            return f'{self.year}年{self.month}月'
+        last_year, last_month = period_range(self.year, self.month, self.periods)[-1]
+        return f'{self.year}年{self.month}月～{last_year}年{last_month}月'
+
+    def period_slices(self):
+        """期間ごとの (year, month, 開始日, 終了日) のリスト（複数期間の表を期間ごとに切り出す用）"""
+        return [(year, month, *period_bounds(year, month))
+                for year, month in period_range(self.year, self.month, self.periods)]
+
+    def position(self, date):
+        """期間内の日付の位置を返す（期間外の場合は None）"""
+        offset = (pd.Timestamp(date).normalize() - self.start_date).days
+        return offset if 0 <= offset < len(self.dates) else None
+
+    @property
+    def holiday_mask(self):
+        """日曜・祝日・カスタム祝日（赤で表示する日）"""
+        return self.day_classes[:, [SUNDAY, NATIONAL, CUSTOM]].any(axis=1)
+
+    @property
+    def day_off_mask(self):
+        """土日・祝日・カスタム祝日（「休み」を自動設定する日）"""
+        return self.day_classes[:, [SATURDAY, SUNDAY, NATIONAL, CUSTOM]].any(axis=1)
+
+    def is_day_off(self, date):
+        i = self.position(date)
+        return i is not None and bool(self.day_classes[i, [SATURDAY, SUNDAY, NATIONAL, CUSTOM]].any())
+
+    def display_class(self, date):
+        """表示用の区分 ('holiday' / 'saturday' / 'weekday') を返す"""
+        i = self.position(date)
+        if i is None:
+            return 'weekday'
+        classes = self.day_classes[i]
+        if classes[SUNDAY] or classes[NATIONAL] or classes[CUSTOM]:
+            return 'holiday'
+        if classes[SATURDAY]:
+            return 'saturday'
+        return 'weekday'
+
+    def display_classes(self):
+        """期間内の全日付の表示区分を配列で返す"""
+        return np.where(self.holiday_mask, 'holiday',
+                        np.where(self.day_classes[:, SATURDAY], 'saturday', 'weekday'))
+
+    def weekday_label(self, date):
+        i = self.position(date)
+        return self.weekday_labels[i] if i is not None else WEEKDAY_JA[pd.Timestamp(date).strftime('%a')]
+
+    def add_custom_holiday(self, date):
+        """カスタム祝日を追加する（該当日の区分だけを更新）"""
+        date = pd.Timestamp(date).normalize()
+        self.custom_holidays.add(date)
+        i = self.position(date)
+        if i is not None:
+            self.day_classes[i, CUSTOM] = True
+
+    def remove_custom_holiday(self, date):
+        """カスタム祝日を削除する（該当日の区分だけを更新）"""
+        date = pd.Timestamp(date).normalize()
+        self.custom_holidays.discard(date)
+        i = self.position(date)
+        if i is not None:
+            self.day_classes[i, CUSTOM] = False
@@ -0,0 +1,177 @@
+import copy
+import functools
+import inspect
+from abc import ABC, abstractmethod
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from perf_trace import timed
+
+# 保存先（Supabase / SQLite）に共通のインターフェースと補助関数
+# （database は import 時に保存先を作成するため、各実装はこのモジュールから読み込む）
+
+def pivot_shift_rows(rows):
+    """shifts テーブルの行（date, employee, shift）を 日付 × 従業員 にピボット"""
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows)
+    df['date'] = pd.to_datetime(df['date'])
+    return df.pivot(index='date', columns='employee', values='shift')
+
+def like_pattern(search):
+    """部分一致検索の LIKE パターン（% と _ は文字として扱う）"""
+    escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+# 1回のリクエスト（1つのトランザクション）で保存するシフトの最大件数
+# （変更履歴の revision もトランザクションごとに最大でこの件数だけ採番される）
+SHIFT_WRITE_BATCH = 500
+
+_REQUEST_MEMO_KEY = '_db_request_memo'
+
+def _current_request_memo():
+    """現在のスクリプト実行で共有する読み込み結果（スクリプト外では None）"""
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    if _REQUEST_MEMO_KEY not in st.session_state:
+        st.session_state[_REQUEST_MEMO_KEY] = {'values': {}, 'queries': 0, 'saved': 0}
+    return st.session_state[_REQUEST_MEMO_KEY]
+
+def _memo_key(name, signature, self, args, kwargs):
+    """位置引数・キーワード引数・省略した引数のどれで渡しても同じになるキー"""
+    bound = signature.bind(self, *args, **kwargs)
+    bound.apply_defaults()
+    return (name, tuple(list(bound.arguments.items())[1:]))
+
+def _copy_result(value):
+    """呼び出し元ごとに別のオブジェクトを返す（変更しても他の呼び出し元に影響しない）"""
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    return copy.deepcopy(value)
+
+def request_memo(method):
+    """同じスクリプト実行内で、同じ引数の読み込みを1回にまとめる
+
+    結果は呼び出しごとにコピーして返す。
+    """
+    name = method.__name__
+    signature = inspect.signature(method)
+    method = timed(name, kind='call')(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        memo = _current_request_memo()
+        if memo is None:
+            return method(self, *args, **kwargs)
+        key = _memo_key(name, signature, self, args, kwargs)
+        if key in memo['values']:
+            memo['saved'] += 1
+            return _copy_result(memo['values'][key])
+        memo['queries'] += 1
+        value = method(self, *args, **kwargs)
+        memo['values'][key] = value
+        return _copy_result(value)
+    return wrapper
+
+def invalidates_request_memo(method):
+    """書き込み後は同じスクリプト実行内でも最新の値を読み直す"""
+    method = timed(method.__name__, kind='call')(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            memo = _current_request_memo()
+            if memo is not None:
+                memo['values'].clear()
+    return wrapper
+
+class ShiftRepository(ABC):
+    """シフト管理で使うデータの保存先（Supabase / SQLite）の共通インターフェース
+
+    読み込み系のメソッドには request_memo、書き込み系のメソッドには
+    invalidates_request_memo を付けて実装する（どちらもメソッドの処理時間を kind='call' で記録する）。
+    それ以外のメソッドには timed(kind='call') を付ける。
+    DB往復（kind='db'）は、実装側で問い合わせを1回実行するごとに記録する。
+    """
+
+    def begin_request(self):
+        """スクリプト実行の開始時に呼び出し、前回の実行の読み込み結果を破棄する"""
+        if get_script_run_ctx(suppress_warning=True) is not None:
+            st.session_state[_REQUEST_MEMO_KEY] = {'values': {}, 'queries': 0, 'saved': 0}
+
+    def prime_request_memo(self, method_name, args, value):
+        """別の経路（並行読み込みなど）で取得済みの結果を登録する"""
+        memo = _current_request_memo()
+        if memo is not None:
+            signature = inspect.signature(getattr(type(self), method_name))
+            memo['queries'] += 1
+            memo['values'][_memo_key(method_name, signature, self, tuple(args), {})] = _copy_result(value)
+
+    def request_stats(self):
+        """現在のスクリプト実行での読み込み回数と、重複排除で省略した回数"""
+        memo = _current_request_memo()
+        if memo is None:
+            return {'queries': 0, 'saved': 0}
+        return {'queries': memo['queries'], 'saved': memo['saved']}
+
+    @abstractmethod
+    def init_db(self): ...
+
+    @abstractmethod
+    def get_work_days(self, year, month): ...
+
+    @abstractmethod
+    def save_work_days(self, year, month, days): ...
+
+    @abstractmethod
+    def get_shifts(self, start_date, end_date): ...
+
+    @abstractmethod
+    def save_shift(self, date, employee, shift_str): ...
+
+    @abstractmethod
+    def save_shifts_bulk(self, records, chunk_size=SHIFT_WRITE_BATCH): ...
+
+    @abstractmethod
+    def get_latest_shift_revision(self): ...
+
+    @abstractmethod
+    def get_shift_changes_since(self, cursor, page_size=1000): ...
+
+    @abstractmethod
+    def get_custom_holidays(self, year, month): ...
+
+    @abstractmethod
+    def get_custom_holidays_between(self, start_date, end_date): ...
+
+    @abstractmethod
+    def add_custom_holiday(self, date): ...
+
+    @abstractmethod
+    def remove_custom_holiday(self, date): ...
+
+    @abstractmethod
+    def get_employees(self): ...
+
+    @abstractmethod
+    def get_all_employees(self): ...
+
+    @abstractmethod
+    def get_employees_page(self, search='', offset=0, limit=50): ...
+
+    @abstractmethod
+    def add_employee(self, name): ...
+
+    @abstractmethod
+    def update_employee(self, id, name=None, display_order=None, is_active=None): ...
+
+    @abstractmethod
+    def set_employees_active(self, id_active_pairs): ...
+
+    @abstractmethod
+    def reorder_employees(self, id_order_pairs): ...
+
+    @abstractmethod
+    def delete_employee(self, id): ...
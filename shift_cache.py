@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+from period_calendar import period_bounds, period_of, period_range
+
+
+class ChangeTracker:
+    """反映済みの変更履歴の revision を、読み直す範囲（cursor - overlap より後）の分だけ覚えておく
+
+    get_shift_changes_since は後からコミットされた変更のために cursor より前から読み直すので、
+    すでに反映した変更をここで除く。
+    """
+
+    def __init__(self, overlap=0):
+        self.overlap = overlap
+        self._applied = set()
+
+    def unapplied(self, changes, cursor):
+        """changes のうち、まだ反映していないものを revision 順に返す"""
+        start = cursor - self.overlap
+        return [change for change in changes if change[0] > start and change[0] not in self._applied]
+
+    def mark_applied(self, changes, cursor):
+        """changes を反映済みとして記録し、読み直す範囲より前の記録を捨てる"""
+        start = cursor - self.overlap
+        self._applied = {revision for revision in self._applied if revision > start}
+        self._applied.update(change[0] for change in changes if change[0] > start)
+
+
+class ShiftCache:
+    """期間ごとのシフト（日付 × 従業員のピボット）を保持する LRU キャッシュ
+
+    保存時は write_through で変更したセルだけを反映し、
+    状態が分からなくなった期間だけを invalidate_dates で破棄する。
+    revision_loader を指定すると、キャッシュ内容がどのリビジョンまで
+    反映済みかを cursor で管理し、apply_changes で差分だけを取り込める。
+    """
+
+    def __init__(self, loader, max_periods=12, ttl=3600, revision_loader=None, change_overlap=0):
+        # loader は (start_date, end_date) を受け取りピボット済みの DataFrame を返す
+        # （読み込みに失敗した場合は None を返し、その期間はキャッシュしない）
+        self._loader = loader
+        self._revision_loader = revision_loader
+        self.cursor = None
+        self._changes = ChangeTracker(change_overlap)
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.max_periods = max_periods
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _is_fresh(self, entry):
+        return self.ttl is None or time.monotonic() - entry[0] < self.ttl
+
+    def get(self, year, month):
+        """期間のシフトを取得（キャッシュになければ読み込む）"""
+        return self.get_with_cursor(year, month)[0]
+
+    def get_with_cursor(self, year, month):
+        """期間のシフトと、その内容が反映済みのリビジョンを取得"""
+        key = (year, month)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_fresh(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], self.cursor
+
+            self.misses += 1
+            # 読み込み前のリビジョンを記録しておけば、以降の変更を取りこぼさない
+            if self.cursor is None and self._revision_loader is not None:
+                self.cursor = self._revision_loader()
+            frame = self._loader(*period_bounds(year, month))
+            if frame is None:
+                return pd.DataFrame(), self.cursor
+            self.put(year, month, frame)
+            return frame, self.cursor
+
+    def get_range(self, year, month, periods):
+        """連続した periods 期間分のシフトを1つの DataFrame で取得
+
+        キャッシュにない期間は最初から最後までを1回の読み込みで取得し、期間ごとに登録する。
+        読み込みに失敗した場合、キャッシュにない期間は空のまま返し、登録もしない。
+        """
+        keys = period_range(year, month, periods)
+        frames = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and self._is_fresh(entry):
+                    self._entries.move_to_end(key)
+                    frames[key] = entry[1]
+            self.hits += len(frames)
+
+            missing = [key for key in keys if key not in frames]
+            if missing:
+                self.misses += len(missing)
+                if self.cursor is None and self._revision_loader is not None:
+                    self.cursor = self._revision_loader()
+                frame = self._loader(period_bounds(*missing[0])[0], period_bounds(*missing[-1])[1])
+                for key in missing:
+                    if frame is None:
+                        frames[key] = pd.DataFrame()
+                        continue
+                    start_date, end_date = period_bounds(*key)
+                    frames[key] = frame.loc[start_date:end_date] if not frame.empty else pd.DataFrame()
+                    self.put(*key, frames[key])
+
+        non_empty = [frames[key] for key in keys if not frames[key].empty]
+        return pd.concat(non_empty).sort_index() if non_empty else pd.DataFrame()
+
+    def contains(self, year, month):
+        """期間が有効期限内でキャッシュされているか"""
+        with self._lock:
+            entry = self._entries.get((year, month))
+            return entry is not None and self._is_fresh(entry)
+
+    def put(self, year, month, frame, cursor=None):
+        """別の経路（並行読み込みなど）で取得した期間のシフトを登録する
+
+        cursor は frame を読み込む前に取得したリビジョン。
+        """
+        with self._lock:
+            if self.cursor is None:
+                self.cursor = cursor
+            self._entries[(year, month)] = (time.monotonic(), frame)
+            self._entries.move_to_end((year, month))
+            while len(self._entries) > self.max_periods:
+                self._entries.popitem(last=False)
+
+    def apply_changes(self, changes):
+        """変更履歴 (revision, date, employee, shift_str) のうち未反映のものを取り込む"""
+        with self._lock:
+            if self.cursor is None:
+                return
+            new_changes = self._changes.unapplied(changes, self.cursor)
+            if not new_changes:
+                return
+            self.write_through([change[1:] for change in new_changes])
+            self.cursor = max(self.cursor, new_changes[-1][0])
+            self._changes.mark_applied(new_changes, self.cursor)
+
+    def write_through(self, records):
+        """保存済みの (date, employee, shift_str) をキャッシュ済みの期間に反映する"""
+        updates = {}
+        for date, employee, shift_str in records:
+            updates.setdefault(period_of(date), []).append((pd.Timestamp(date).normalize(), employee, shift_str))
+
+        with self._lock:
+            for key, period_records in updates.items():
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                # 呼び出し側に渡した DataFrame は変更せず、コピーを差し替える
+                frame = entry[1].copy()
+                for date, employee, shift_str in period_records:
+                    if shift_str == '-':
+                        if date in frame.index and employee in frame.columns:
+                            frame.loc[date, employee] = None
+                    else:
+                        frame.loc[date, employee] = shift_str
+                self._entries[key] = (entry[0], frame.sort_index())
+
+    def invalidate_dates(self, dates):
+        """指定した日付を含む期間だけをキャッシュから破棄する"""
+        with self._lock:
+            for key in {period_of(date) for date in dates}:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.cursor = None
+            self._changes = ChangeTracker(self._changes.overlap)
+
+    def stats(self):
+        """ヒット数・ミス数・キャッシュ中の期間数"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'periods': len(self._entries)}
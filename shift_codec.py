@@ -0,0 +1,90 @@
+import sys
+from functools import lru_cache
+
+# シフト文字列の形式: "種類,時間@店舗,時間@店舗,..."
+# 例: "ヘルプ,10-15@本店,15-19@武店" / "休み" / "有給"
+# 種類・時間・店舗の前後の空白は解析時に取り除き、encode_shift は空白のない正規形を返す。
+# 正規形の文字列 s は encode_shift(decode_shift(s)) == s で元に戻る
+# （"ヘルプ, 10-15 @ 本店" のような文字列は "ヘルプ,10-15@本店" に正規化される）。
+
+
+class Shift:
+    """解析済みのシフト（キャッシュで共有されるため変更しないこと）"""
+
+    __slots__ = ('shift_type', 'entries')
+
+    def __init__(self, shift_type, entries=()):
+        # entries は (time, store) のタプル列。'@' を含まない項目は store が None
+        self.shift_type = shift_type
+        self.entries = tuple(entries)
+
+    @classmethod
+    def from_parts(cls, shift_type, times=(), stores=()):
+        """種類・時間・店舗のリストから Shift を作成"""
+        return cls(shift_type, zip(times, stores))
+
+    @property
+    def times(self):
+        return tuple(time for time, _ in self.entries)
+
+    @property
+    def stores(self):
+        return tuple(store or '' for _, store in self.entries)
+
+    @property
+    def assigned_stores(self):
+        """時間と店舗の両方が指定されている店舗"""
+        return tuple(store for time, store in self.entries if time and store)
+
+    def __eq__(self, other):
+        if not isinstance(other, Shift):
+            return NotImplemented
+        return self.shift_type == other.shift_type and self.entries == other.entries
+
+    def __hash__(self):
+        return hash((self.shift_type, self.entries))
+
+    def __repr__(self):
+        return f"Shift({self.shift_type!r}, {self.entries!r})"
+
+    def __str__(self):
+        return encode_shift(self)
+
+
+def is_empty_shift(value):
+    """未入力（欠損値・空文字・'-'）かどうか"""
+    return not isinstance(value, str) or value in ('', '-')
+
+
+def decode_shift(value):
+    """シフト文字列を Shift に変換する（未入力の場合は None）
+
+    各項目の前後の空白は取り除く。時間に '@' が複数含まれるなど形式が不正な場合は ValueError を送出する。
+    """
+    if is_empty_shift(value):
+        return None
+    return _decode(value)
+
+
+@lru_cache(maxsize=4096)
+def _decode(shift_str):
+    parts = shift_str.split(',')
+    entries = []
+    for part in parts[1:]:
+        time, sep, store = part.partition('@')
+        time = sys.intern(time.strip())
+        if not sep:
+            entries.append((time, None))
+            continue
+        if '@' in store:
+            raise ValueError(f"シフトの形式が不正です: {shift_str}")
+        entries.append((time, sys.intern(store.strip())))
+    return Shift(sys.intern(parts[0].strip()), entries)
+
+
+def encode_shift(shift):
+    """Shift を正規形のシフト文字列に変換する（decode_shift の逆変換）"""
+    parts = [shift.shift_type]
+    for time, store in shift.entries:
+        parts.append(time if store is None else f'{time}@{store}')
+    return ','.join(parts)
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from constants import SHIFT_TYPES, AREAS
+from shift_codec import decode_shift
+
+ALL_STORES = [store for stores in AREAS.values() for store in stores]
+
+
+def calculate_shift_count(shift_data):
+    """従業員ごとのシフト日数を計算する（「休み」と欠損値以外は全てカウント）"""
+    values = shift_data.to_numpy(dtype=object)
+    counted = pd.notna(values) & (values != '休み')
+    return pd.Series(counted.sum(axis=0), index=shift_data.columns)
+
+
+def _tally(shift_data):
+    """従業員 × 値の種類ごとの日数行列と、値の一覧を返す
+
+    同じシフト文字列は一度だけ解析すればよいように、値を factorize して
+    列ごとの出現回数を bincount でまとめて数える。
+    """
+    values = shift_data.to_numpy(dtype=object)
+    n_rows, n_cols = values.shape
+    codes, uniques = pd.factorize(values.ravel(order='F'), use_na_sentinel=False)
+    n_uniques = len(uniques)
+    offsets = np.repeat(np.arange(n_cols) * n_uniques, n_rows)
+    tally = np.bincount(codes + offsets, minlength=n_cols * n_uniques)
+    return tally.reshape(n_cols, n_uniques), uniques
+
+
+def _decode_uniques(uniques):
+    parsed = []
+    for value in uniques:
+        try:
+            parsed.append(decode_shift(value))
+        except ValueError:
+            parsed.append(None)
+    return parsed
+
+
+def count_by_shift_type(shift_data):
+    """従業員 × シフト種類（ヘルプ/有給/休み/かご北/リクルート）の日数を計算する"""
+    tally, uniques = _tally(shift_data)
+    type_mask = np.zeros((len(uniques), len(SHIFT_TYPES)), dtype=np.int64)
+    for i, shift in enumerate(_decode_uniques(uniques)):
+        if shift is not None and shift.shift_type in SHIFT_TYPES:
+            type_mask[i, SHIFT_TYPES.index(shift.shift_type)] = 1
+    return pd.DataFrame(tally @ type_mask, index=shift_data.columns, columns=SHIFT_TYPES)
+
+
+def count_by_store(shift_data):
+    """従業員 × 店舗ごとのヘルプ日数を計算する（同じ日に同じ店舗へ複数回でも1日）"""
+    tally, uniques = _tally(shift_data)
+    parsed = _decode_uniques(uniques)
+
+    stores = list(ALL_STORES)
+    for shift in parsed:
+        if shift is not None:
+            stores.extend(s for s in shift.assigned_stores if s not in stores)
+    store_index = {store: i for i, store in enumerate(stores)}
+
+    store_mask = np.zeros((len(uniques), len(stores)), dtype=np.int64)
+    for i, shift in enumerate(parsed):
+        if shift is not None:
+            for store in shift.assigned_stores:
+                store_mask[i, store_index[store]] = 1
+    return pd.DataFrame(tally @ store_mask, index=shift_data.columns, columns=stores)
@@ -0,0 +1,129 @@
+import io
+from functools import lru_cache
+from html import escape
+import pandas as pd
+from constants import (
+    STORE_COLORS, DAY_OFF_COLORS, HOLIDAY_BG_COLOR, SATURDAY_BG_COLOR, KAGOKITA_BG_COLOR, RECRUIT_BG_COLOR,
+    COVERAGE_GAP_BG_COLOR
+)
+from shift_codec import decode_shift
+
+# 店舗ごとの文字色クラス（クラス名には日本語を使わず番号を振る）
+STORE_CLASSES = {store: f'store-{i}' for i, store in enumerate(STORE_COLORS)}
+
+
+@lru_cache(maxsize=None)
+def shift_table_css():
+    """シフト表で使う CSS（行の背景色・バッジ・店舗ごとの文字色）"""
+    rules = [
+        f'table.shift-table tr.holiday td {{ background-color: {HOLIDAY_BG_COLOR}; }}',
+        f'table.shift-table tr.saturday td {{ background-color: {SATURDAY_BG_COLOR}; }}',
+        'table.shift-table div.cell { display: flex; align-items: center; justify-content: center; }',
+        'table.shift-table div.lines { white-space: pre-line; }',
+        'table.shift-table span.badge { padding: 4px 8px; border-radius: 4px; display: inline-block; }',
+        'table.shift-table span.store-badge { padding: 2px 4px; border-radius: 4px; display: inline-block; margin: 2px; }',
+        f'table.shift-table span.kagokita {{ background-color: {KAGOKITA_BG_COLOR}; }}',
+        f'table.shift-table span.recruit {{ background-color: {RECRUIT_BG_COLOR}; }}',
+        'table.shift-table span.store-unknown { color: #000000; }',
+        f'table.shift-table span.coverage-gap {{ background-color: {COVERAGE_GAP_BG_COLOR}; }}',
+    ]
+    for day_class, (text_color, bg_color) in DAY_OFF_COLORS.items():
+        rules.append(f'table.shift-table span.day-off-{day_class} {{ color: {text_color}; background-color: {bg_color}; }}')
+    for store, class_name in STORE_CLASSES.items():
+        rules.append(f'table.shift-table .{class_name} {{ color: {STORE_COLORS[store]}; }}')
+    return '\n'.join(rules)
+
+
+def _badge(text, class_name):
+    return f'<div class="cell"><span class="badge {class_name}">{escape(text)}</span></div>'
+
+
+@lru_cache(maxsize=4096)
+def render_cell(value, day_class):
+    """シフト表の1セル分のHTML（シフト文字列と日付区分の組み合わせごとに1回だけ生成）"""
+    if value in ('休み', '有給'):
+        # 日曜・祝日は赤、土曜は青、平日はデフォルトの色
+        return _badge(value, f'day-off-{day_class}')
+    if value == 'かご北':
+        return _badge(value, 'kagokita')
+    if value == 'リクルート':
+        return _badge(value, 'recruit')
+    if value == '-':
+        return value
+
+    try:
+        shift = decode_shift(value)
+    except ValueError:
+        return escape(value)
+    if shift is None:
+        return '-'
+
+    lines = []
+    for time, store in shift.entries:
+        if store is None:
+            lines.append(escape(time))
+        elif store == 'かご北':
+            lines.append(f'<span class="store-badge kagokita">{escape(time)}@{escape(store)}</span>')
+        else:
+            class_name = STORE_CLASSES.get(store, 'store-unknown')
+            lines.append(f'<span class="{class_name}">{escape(time)}@{escape(store)}</span>')
+
+    if shift.shift_type == 'ヘルプ':
+        lines.insert(0, shift.shift_type)
+        return f'<div class="lines">{chr(10).join(lines)}</div>' if len(lines) > 1 else shift.shift_type
+    return f'<div class="lines">{chr(10).join(lines)}</div>' if lines else '-'
+
+
+def render_shift_column(values, day_classes):
+    """1列分のセルを render_cell で変換（文字列以外の値はそのまま）"""
+    return [render_cell(value, day_class) if isinstance(value, str) else value
+            for value, day_class in zip(values, day_classes)]
+
+
+def render_grid_page(shift_data, calendar, employees, start, stop):
+    """日付 × 従業員 のシフトのうち start:stop 行目だけを表示用に変換する
+
+    戻り値は (日付・曜日・従業員の列を持つ表示用の DataFrame, 行ごとの日付区分)。
+    """
+    page = shift_data.iloc[start:stop].reindex(columns=employees, fill_value='')
+    positions = calendar.dates.get_indexer(page.index)
+    day_classes = calendar.display_classes()[positions]
+    display_data = {'日付': page.index.strftime('%Y-%m-%d'), '曜日': calendar.weekday_labels[positions]}
+    for emp in employees:
+        display_data[emp] = render_shift_column(page[emp], day_classes)
+    return pd.DataFrame(display_data), day_classes
+
+
+def render_coverage_cell(employees):
+    """店舗別表示の1セル分のHTML（誰も入っていない日は強調する）"""
+    if not employees:
+        return '<div class="cell"><span class="badge coverage-gap">未配置</span></div>'
+    return f'<div class="lines">{escape(chr(10).join(employees))}</div>'
+
+
+def build_table_html(frame, row_classes=None, cell_class=None, header_classes=None, table_class='shift-table'):
+    """DataFrame の値（HTML断片）をそのまま並べた表を作成する
+
+    row_classes は行ごとの tr のクラス、cell_class は全 td に付けるクラス、
+    header_classes は {列名: th のクラス}。
+    """
+    header_classes = header_classes or {}
+    buffer = io.StringIO()
+    buffer.write(f'<table class="{table_class}"><thead><tr>')
+    for column in frame.columns:
+        header_class = header_classes.get(column)
+        buffer.write(f'<th class="{header_class}">' if header_class else '<th>')
+        buffer.write(f'{escape(str(column))}</th>')
+    buffer.write('</tr></thead><tbody>')
+
+    td = f'<td class="{cell_class}">' if cell_class else '<td>'
+    for i, row in enumerate(frame.itertuples(index=False, name=None)):
+        row_class = row_classes[i] if row_classes is not None else None
+        buffer.write(f'<tr class="{row_class}">' if row_class else '<tr>')
+        for value in row:
+            buffer.write(td)
+            buffer.write(value if isinstance(value, str) else str(value))
+            buffer.write('</td>')
+        buffer.write('</tr>')
+    buffer.write('</tbody></table>')
+    return buffer.getvalue()
@@ -0,0 +1,373 @@
+import sqlite3
+import threading
+import pandas as pd
+import streamlit as st
+from repository import (
+    ShiftRepository, request_memo, invalidates_request_memo, pivot_shift_rows, like_pattern, SHIFT_WRITE_BATCH
+)
+from perf_trace import timed, timing
+from period_calendar import period_bounds
+
+# Supabase と同じテーブル構成（日付は 'YYYY-MM-DD' の文字列で保存する）
+SCHEMA = """
+create table if not exists shifts (
+    id integer primary key autoincrement,
+    date text not null,
+    employee text not null,
+    shift text
+);
+create unique index if not exists shifts_date_employee_key on shifts (date, employee);
+
+create table if not exists work_days (
+    year integer not null,
+    month integer not null,
+    days integer not null,
+    primary key (year, month)
+);
+
+create table if not exists custom_holidays (
+    date text primary key
+);
+
+create table if not exists employees (
+    id integer primary key autoincrement,
+    name text not null,
+    display_order integer not null,
+    is_active integer not null default 1
+);
+create index if not exists employees_display_order_idx on employees (display_order);
+
+create table if not exists shift_changes (
+    revision integer primary key autoincrement,
+    date text not null,
+    employee text not null,
+    shift text,
+    changed_at text not null default current_timestamp
+);
+
+create trigger if not exists shifts_record_insert after insert on shifts begin
+    insert into shift_changes (date, employee, shift) values (new.date, new.employee, new.shift);
+end;
+create trigger if not exists shifts_record_update after update on shifts begin
+    insert into shift_changes (date, employee, shift)
+        select old.date, old.employee, null
+        where old.date is not new.date or old.employee is not new.employee;
+    insert into shift_changes (date, employee, shift) values (new.date, new.employee, new.shift);
+end;
+create trigger if not exists shifts_record_delete after delete on shifts begin
+    insert into shift_changes (date, employee, shift) values (old.date, old.employee, null);
+end;
+"""
+
+
+class SQLiteDB(ShiftRepository):
+    """ローカルの SQLite ファイルを使う保存先（オフライン利用・ベンチマーク用）"""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            # Streamlit は実行ごとに別スレッドになるため、接続を共有してロックで直列化する
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute('pragma journal_mode=WAL')
+            self._conn.execute('pragma synchronous=NORMAL')
+            self._lock = threading.RLock()
+        except Exception as e:
+            st.error(f"データベース接続エラー: {str(e)}")
+            raise
+
+    def _query(self, sql, params=()):
+        """SQL を1回実行する（DB往復として処理時間を記録する）"""
+        with self._lock, timing(f'sqlite.{sql.split(None, 1)[0].lower()}', kind='db'):
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def _transaction(self, statements):
+        """(sql, params) の列を1つのトランザクションで実行する（まとめて1回の DB往復として記録する）"""
+        with self._lock, timing('sqlite.transaction', kind='db'):
+            self._conn.execute('begin')
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+            except Exception:
+                self._conn.execute('rollback')
+                raise
+            self._conn.execute('commit')
+
+    @timed(kind='call')
+    def init_db(self):
+        try:
+            with self._lock, timing('sqlite.schema', kind='db'):
+                self._conn.executescript(SCHEMA)
+            return True
+        except Exception as e:
+            st.error(f"データベース接続エラー: {e}")
+            return False
+
+    @request_memo
+    def get_work_days(self, year, month):
+        try:
+            rows = self._query('select days from work_days where year = ? and month = ?', (year, month))
+            return rows[0]['days'] if rows else None
+        except Exception as e:
+            st.error(f"労働日数の取得エラー: {e}")
+            return None
+
+    @invalidates_request_memo
+    def save_work_days(self, year, month, days):
+        """労働日数を保存し、保存後の行を返す（失敗した場合は False）"""
+        try:
+            return self._query(
+                'insert into work_days (year, month, days) values (?, ?, ?) '
+                'on conflict (year, month) do update set days = excluded.days '
+                'returning year, month, days',
+                (year, month, days)
+            )[0]
+        except Exception as e:
+            st.error(f"労働日数の保存エラー: {e}")
+            return False
+
+    @request_memo
+    def get_shifts(self, start_date, end_date):
+        """start_date から end_date までのシフトを取得（失敗した場合は None）"""
+        try:
+            rows = self._query(
+                'select date, employee, shift from shifts where date between ? and ?',
+                (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+            )
+            return pivot_shift_rows(rows)
+        except Exception as e:
+            st.error(f"シフトデータの取得エラー: {e}")
+            return None
+
+    @invalidates_request_memo
+    def save_shift(self, date, employee, shift_str):
+        """シフトを保存し、保存後の行を返す（'-' の場合は削除して shift が None の行、失敗した場合は False）"""
+        try:
+            date_str = date.strftime('%Y-%m-%d')
+            if shift_str == '-':
+                self._query('delete from shifts where date = ? and employee = ?', (date_str, employee))
+                return {'date': date_str, 'employee': employee, 'shift': None}
+            return self._query(
+                'insert into shifts (date, employee, shift) values (?, ?, ?) '
+                'on conflict (date, employee) do update set shift = excluded.shift '
+                'returning date, employee, shift',
+                (date_str, employee, shift_str)
+            )[0]
+        except Exception as e:
+            st.error(f"シフトの保存エラー: {e}")
+            return False
+
+    @invalidates_request_memo
+    def save_shifts_bulk(self, records, chunk_size=SHIFT_WRITE_BATCH):
+        """複数のシフトを1つのトランザクションで保存し、保存に失敗したレコードのリストを返す"""
+        latest = {}
+        for date, employee, shift_str in records:
+            latest[(pd.Timestamp(date).normalize(), employee)] = shift_str
+
+        statements = []
+        for (date, employee), shift_str in latest.items():
+            date_str = date.strftime('%Y-%m-%d')
+            if shift_str == '-':
+                statements.append(('delete from shifts where date = ? and employee = ?', (date_str, employee)))
+            else:
+                statements.append((
+                    'insert into shifts (date, employee, shift) values (?, ?, ?) '
+                    'on conflict (date, employee) do update set shift = excluded.shift',
+                    (date_str, employee, shift_str)
+                ))
+        try:
+            self._transaction(statements)
+            return []
+        except Exception as e:
+            st.error(f"シフトの一括保存エラー: {e}")
+            return [(date, employee, shift_str) for (date, employee), shift_str in latest.items()]
+
+    @request_memo
+    def get_latest_shift_revision(self):
+        """シフト変更履歴の最新リビジョンを取得（履歴がない場合は 0）"""
+        try:
+            return self._query('select coalesce(max(revision), 0) as revision from shift_changes')[0]['revision']
+        except Exception as e:
+            st.error(f"シフト変更履歴の取得エラー: {e}")
+            return None
+
+    @timed(kind='call')
+    def get_shift_changes_since(self, cursor, page_size=1000):
+        """cursor より後のシフト変更を page_size 件ずつ取得し、(変更リスト, 新しい cursor) を返す"""
+        changes = []
+        try:
+            while True:
+                rows = self._query(
+                    'select revision, date, employee, shift from shift_changes '
+                    'where revision > ? order by revision limit ?',
+                    (cursor, page_size)
+                )
+                changes.extend(
+                    (row['revision'], pd.Timestamp(row['date']), row['employee'],
+                     row['shift'] if row['shift'] is not None else '-')
+                    for row in rows
+                )
+                if rows:
+                    cursor = rows[-1]['revision']
+                if len(rows) < page_size:
+                    return changes, cursor
+        except Exception as e:
+            st.error(f"シフト変更履歴の取得エラー: {e}")
+            return changes, cursor
+
+    def get_custom_holidays(self, year, month):
+        """カスタム祝日を取得（読み込みの重複排除は get_custom_holidays_between で行う）"""
+        return self.get_custom_holidays_between(*period_bounds(year, month))
+
+    @request_memo
+    def get_custom_holidays_between(self, start_date, end_date):
+        """期間を問わず、start_date から end_date までのカスタム祝日を取得"""
+        try:
+            rows = self._query(
+                'select date from custom_holidays where date between ? and ?',
+                (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+            )
+            return [pd.Timestamp(row['date']) for row in rows]
+        except Exception as e:
+            st.error(f"カスタム祝日の取得エラー: {e}")
+            return []
+
+    @invalidates_request_memo
+    def add_custom_holiday(self, date):
+        """カスタム祝日を追加"""
+        try:
+            self._transaction([('insert into custom_holidays (date) values (?)', (date.strftime('%Y-%m-%d'),))])
+            return True
+        except Exception as e:
+            st.error(f"カスタム祝日の追加エラー: {e}")
+            return False
+
+    @invalidates_request_memo
+    def remove_custom_holiday(self, date):
+        """カスタム祝日を削除"""
+        try:
+            self._transaction([('delete from custom_holidays where date = ?', (date.strftime('%Y-%m-%d'),))])
+            return True
+        except Exception as e:
+            st.error(f"カスタム祝日の削除エラー: {e}")
+            return False
+
+    @request_memo
+    def get_employees(self):
+        """スタッフ一覧を取得"""
+        try:
+            rows = self._query('select name from employees where is_active = 1 order by display_order')
+            return [row['name'] for row in rows]
+        except Exception as e:
+            st.error(f"スタッフ情報の取得エラー: {e}")
+            return []
+
+    @request_memo
+    def get_all_employees(self):
+        """全てのスタッフ情報を取得（管理用）"""
+        try:
+            rows = self._query('select id, name, display_order, is_active from employees order by display_order')
+            for row in rows:
+                row['is_active'] = bool(row['is_active'])
+            return rows
+        except Exception as e:
+            st.error(f"スタッフ情報の取得エラー: {e}")
+            return []
+
+    @request_memo
+    def get_employees_page(self, search='', offset=0, limit=50):
+        """スタッフ情報を1ページ分取得し、(スタッフ情報のリスト, 条件に合う人数) を返す（管理用、失敗した場合は None）"""
+        # 名前の部分一致（SQLite の like は英字の大文字・小文字を区別しない）
+        where, params = ("where name like ? escape '\\'", (like_pattern(search),)) if search else ('', ())
+        try:
+            with self._lock:
+                total = self._query(f'select count(*) as total from employees {where}', params)[0]['total']
+                rows = self._query(
+                    f'select id, name, display_order, is_active from employees {where} '
+                    'order by display_order limit ? offset ?',
+                    (*params, limit, offset)
+                )
+            for row in rows:
+                row['is_active'] = bool(row['is_active'])
+            return rows, total
+        except Exception as e:
+            st.error(f"スタッフ情報の取得エラー: {e}")
+            return None
+
+    @invalidates_request_memo
+    def add_employee(self, name):
+        """新しいスタッフを追加"""
+        try:
+            self._transaction([(
+                'insert into employees (name, display_order, is_active) '
+                'select ?, coalesce(max(display_order), 0) + 1, 1 from employees',
+                (name,)
+            )])
+            return True
+        except Exception as e:
+            st.error(f"スタッフの追加エラー: {e}")
+            return False
+
+    @invalidates_request_memo
+    def update_employee(self, id, name=None, display_order=None, is_active=None):
+        """スタッフ情報を更新"""
+        try:
+            update_data = {}
+            if name is not None:
+                update_data['name'] = name
+            if display_order is not None:
+                update_data['display_order'] = display_order
+            if is_active is not None:
+                update_data['is_active'] = int(is_active)
+
+            if update_data:
+                assignments = ', '.join(f'{column} = ?' for column in update_data)
+                self._transaction([
+                    (f'update employees set {assignments} where id = ?', (*update_data.values(), id))
+                ])
+            return True
+        except Exception as e:
+            st.error(f"スタッフ情報の更新エラー: {e}")
+            return False
+
+    @invalidates_request_memo
+    def set_employees_active(self, id_active_pairs):
+        """複数のスタッフの有効・無効をまとめて更新"""
+        try:
+            self._transaction([
+                ('update employees set is_active = ? where id = ?', (int(is_active), emp_id))
+                for emp_id, is_active in id_active_pairs
+            ])
+            return True
+        except Exception as e:
+            st.error(f"スタッフ情報の更新エラー: {e}")
+            return False
+
+    @invalidates_request_memo
+    def reorder_employees(self, id_order_pairs):
+        """スタッフの表示順序を更新"""
+        try:
+            self._transaction([
+                ('update employees set display_order = ? where id = ?', (new_order, emp_id))
+                for emp_id, new_order in id_order_pairs
+            ])
+            return True
+        except Exception as e:
+            st.error(f"表示順序の更新エラー: {e}")
+            return False
+
+    @invalidates_request_memo
+    def delete_employee(self, id):
+        """スタッフを完全に削除"""
+        try:
+            # 削除と表示順序の振り直し（1から）を1つのトランザクションで行う
+            self._transaction([
+                ('delete from employees where id = ?', (id,)),
+                ('update employees set display_order = ranked.position '
+                 'from (select id, row_number() over (order by display_order, id) as position from employees) as ranked '
+                 'where employees.id = ranked.id and employees.display_order != ranked.position', ()),
+            ])
+            return True
+        except Exception as e:
+            st.error(f"スタッフの削除エラー: {e}")
+            return False
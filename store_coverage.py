@@ -0,0 +1,83 @@
+from collections import defaultdict
+import pandas as pd
+from shift_codec import decode_shift
+
+_NO_STORES = frozenset()
+
+
+def shift_stores(value):
+    """シフト文字列で担当している店舗（解析できない値や店舗のないシフトは空）
+
+    shift_counter と同じく、時間と店舗の両方が指定されているもの（Shift.assigned_stores）だけを数える。
+    """
+    if not isinstance(value, str):
+        return _NO_STORES
+    try:
+        shift = decode_shift(value)
+    except ValueError:
+        return _NO_STORES
+    if shift is None:
+        return _NO_STORES
+    return frozenset(shift.assigned_stores)
+
+
+class StoreCoverageIndex:
+    """(日付, 店舗) → その店舗に入っている従業員 の索引
+
+    期間のシフトから一度だけ作成し、セルの変更は update で差分だけ反映する。
+    """
+
+    def __init__(self):
+        self._coverage = defaultdict(set)
+        self._cell_stores = {}
+
+    @classmethod
+    def from_frame(cls, shift_data):
+        """日付 × 従業員 のシフトから索引を作成（セルごとに1回だけ解析する）"""
+        index = cls()
+        for employee in shift_data.columns:
+            for date, value in shift_data[employee].items():
+                index.update(date, employee, value)
+        return index
+
+    def update(self, date, employee, value):
+        """1セル分のシフトの変更を反映する"""
+        date = pd.Timestamp(date).normalize()
+        new_stores = shift_stores(value)
+        old_stores = self._cell_stores.get((date, employee), _NO_STORES)
+        if new_stores == old_stores:
+            return
+        for store in old_stores - new_stores:
+            employees = self._coverage[(date, store)]
+            employees.discard(employee)
+            if not employees:
+                del self._coverage[(date, store)]
+        for store in new_stores - old_stores:
+            self._coverage[(date, store)].add(employee)
+        if new_stores:
+            self._cell_stores[(date, employee)] = new_stores
+        else:
+            self._cell_stores.pop((date, employee), None)
+
+    def is_covered(self, date, store):
+        """その日にその店舗に誰かが入っているか"""
+        return (pd.Timestamp(date).normalize(), store) in self._coverage
+
+    def coverage_frame(self, dates, stores, employee_order=()):
+        """日付 × 店舗 の表（セルはその店舗に入っている従業員のタプル）
+
+        従業員は employee_order の順に並べ、含まれない従業員は名前順で後ろに付ける。
+        """
+        rank = {employee: i for i, employee in enumerate(employee_order)}
+        sort_key = lambda employee: (rank.get(employee, len(rank)), employee)
+        dates = pd.DatetimeIndex(dates).normalize()
+        data = [
+            [tuple(sorted(self._coverage.get((date, store), ()), key=sort_key)) for store in stores]
+            for date in dates
+        ]
+        return pd.DataFrame(data, index=dates, columns=list(stores))
+
+    def gaps(self, dates, stores):
+        """店舗ごとに、誰も入っていない日付のリストを返す"""
+        dates = pd.DatetimeIndex(dates).normalize()
+        return {store: [date for date in dates if (date, store) not in self._coverage] for store in stores}
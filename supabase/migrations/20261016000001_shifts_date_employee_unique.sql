@@ -0,0 +1,10 @@
+-- save_shifts_bulk の upsert (on_conflict=date,employee) に必要な一意制約
+-- 既存の重複レコードは後から登録されたもの（id が大きいもの）を残して削除する
+delete from shifts a
+    using shifts b
+    where a.date = b.date
+      and a.employee = b.employee
+      and a.id < b.id;
+
+alter table shifts
+    add constraint shifts_date_employee_key unique (date, employee);
@@ -0,0 +1,29 @@
+-- シフトの変更履歴（get_shift_changes_since で差分を取得するためのログ）
+-- revision は単調増加し、削除は shift = null として記録する
+create table if not exists shift_changes (
+    revision bigserial primary key,
+    date date not null,
+    employee text not null,
+    shift text,
+    changed_at timestamptz not null default now()
+);
+
+create or replace function record_shift_change() returns trigger
+language plpgsql as $$
+begin
+    if tg_op in ('DELETE', 'UPDATE') then
+        if tg_op = 'DELETE' or (old.date, old.employee) is distinct from (new.date, new.employee) then
+            insert into shift_changes (date, employee, shift) values (old.date, old.employee, null);
+        end if;
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        insert into shift_changes (date, employee, shift) values (new.date, new.employee, new.shift);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists shifts_record_change on shifts;
+create trigger shifts_record_change
+    after insert or update or delete on shifts
+    for each row execute function record_shift_change();
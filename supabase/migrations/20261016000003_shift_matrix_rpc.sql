@@ -0,0 +1,11 @@
+-- 期間のシフトを 日付 × 従業員 の形で返す（get_shifts から rpc で呼び出す）
+-- 1日1行で、shifts は {従業員名: シフト文字列} の jsonb
+create or replace function get_shift_matrix(start_date date, end_date date)
+returns table (date date, shifts jsonb)
+language sql stable as $$
+    select s.date, jsonb_object_agg(s.employee, s.shift)
+    from shifts s
+    where s.date between start_date and end_date
+    group by s.date
+    order by s.date;
+$$;
@@ -0,0 +1,10 @@
+-- save_work_days の upsert (on_conflict=year,month) に必要な一意制約
+-- 既存の重複レコードは後から登録されたもの（id が大きいもの）を残して削除する
+delete from work_days a
+    using work_days b
+    where a.year = b.year
+      and a.month = b.month
+      and a.id < b.id;
+
+alter table work_days
+    add constraint work_days_year_month_key unique (year, month);
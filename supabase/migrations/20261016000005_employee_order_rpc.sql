@@ -0,0 +1,49 @@
+-- スタッフの表示順序をまとめて更新する（reorder_employees から rpc で呼び出す）
+-- orders は [{"id": 1, "display_order": 2}, ...] の jsonb
+-- 途中で表示順序が重複しないように、いったん負の値に退避してから1つのトランザクションで更新する
+-- 戻り値は更新した人数（void だと応答の本文が空になるため値を返す）
+drop function if exists reorder_employees(jsonb);
+create function reorder_employees(orders jsonb)
+returns integer
+language plpgsql as $$
+declare
+    updated integer;
+begin
+    update employees e
+        set display_order = -o.display_order
+        from jsonb_to_recordset(orders) as o(id bigint, display_order integer)
+        where e.id = o.id;
+
+    update employees e
+        set display_order = -e.display_order
+        from jsonb_to_recordset(orders) as o(id bigint, display_order integer)
+        where e.id = o.id;
+    get diagnostics updated = row_count;
+    return updated;
+end;
+$$;
+
+-- スタッフを削除し、残りの表示順序を1から振り直す（delete_employee から rpc で呼び出す）
+-- 戻り値は削除した人数
+drop function if exists delete_employee_compact(bigint);
+create function delete_employee_compact(employee_id bigint)
+returns integer
+language plpgsql as $$
+declare
+    deleted integer;
+begin
+    delete from employees where id = employee_id;
+    get diagnostics deleted = row_count;
+
+    update employees e
+        set display_order = -r.position
+        from (select id, row_number() over (order by display_order, id) as position from employees) r
+        where e.id = r.id
+          and e.display_order <> r.position;
+
+    update employees
+        set display_order = -display_order
+        where display_order < 0;
+    return deleted;
+end;
+$$;
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# テスト対象のモジュールはリポジトリ直下にあるため、import できるようにする
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
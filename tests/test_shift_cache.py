@@ -0,0 +1,134 @@
+import pandas as pd
+import pytest
+from period_calendar import period_bounds
+from shift_cache import ChangeTracker, ShiftCache
+
+
+def change(revision, date, employee, shift_str):
+    return (revision, pd.Timestamp(date), employee, shift_str)
+
+
+class FakeLoader:
+    """期間ごとのシフトを返す loader（呼び出し回数を記録する）"""
+
+    def __init__(self, cells=None):
+        self.cells = cells or {}
+        self.calls = []
+        self.fail = False
+
+    def __call__(self, start_date, end_date):
+        self.calls.append((start_date, end_date))
+        if self.fail:
+            return None
+        rows = {(date, employee): shift for (date, employee), shift in self.cells.items()
+                if start_date <= date <= end_date}
+        if not rows:
+            return pd.DataFrame()
+        frame = pd.Series(rows).unstack()
+        frame.index = pd.DatetimeIndex(frame.index)
+        return frame
+
+
+@pytest.fixture
+def loader():
+    return FakeLoader({(pd.Timestamp('2026-01-20'), 'A'): 'ヘルプ,10-15@本店',
+                       (pd.Timestamp('2026-02-20'), 'B'): '休み'})
+
+
+@pytest.fixture
+def cache(loader):
+    return ShiftCache(loader, revision_loader=lambda: 100, change_overlap=10)
+
+
+def test_tracker_skips_changes_before_the_window():
+    tracker = ChangeTracker(overlap=10)
+    changes = [change(89, '2026-01-20', 'A', '休み'), change(90, '2026-01-20', 'A', '有給'),
+               change(91, '2026-01-20', 'A', '-')]
+    assert [c[0] for c in tracker.unapplied(changes, 100)] == [91]
+
+
+def test_tracker_dedupes_the_re_read_window():
+    tracker = ChangeTracker(overlap=10)
+    first = [change(101, '2026-01-20', 'A', '休み'), change(103, '2026-01-20', 'B', '休み')]
+    tracker.mark_applied(tracker.unapplied(first, 100), 103)
+
+    # 102 は 103 より後にコミットされ、次の読み込みで初めて見える
+    second = first + [change(102, '2026-01-21', 'A', '有給'), change(104, '2026-01-22', 'A', '有給')]
+    second.sort()
+    assert [c[0] for c in tracker.unapplied(second, 103)] == [102, 104]
+
+
+def test_tracker_forgets_revisions_that_leave_the_window():
+    tracker = ChangeTracker(overlap=10)
+    tracker.mark_applied([change(101, '2026-01-20', 'A', '休み')], 101)
+    tracker.mark_applied([change(120, '2026-01-20', 'A', '有給')], 120)
+    assert tracker._applied == {120}
+
+
+def test_apply_changes_is_ignored_until_a_cursor_exists(loader):
+    cache = ShiftCache(loader)
+    cache.apply_changes([change(1, '2026-01-20', 'A', '休み')])
+    assert cache.cursor is None
+
+
+def test_apply_changes_applies_in_revision_order(cache):
+    cache.get(2026, 1)
+    cache.apply_changes([change(101, '2026-01-20', 'A', '休み'), change(102, '2026-01-20', 'A', '有給')])
+    assert cache.get(2026, 1).loc['2026-01-20', 'A'] == '有給'
+    assert cache.cursor == 102
+
+
+def test_apply_changes_picks_up_a_late_commit_once(cache):
+    cache.get(2026, 1)
+    cache.apply_changes([change(101, '2026-01-20', 'A', '休み'), change(103, '2026-01-21', 'A', '有給')])
+    assert cache.cursor == 103
+
+    # 後からコミットされた 102 だけを反映し、反映済みの 101・103 は繰り返さない
+    cache.write_through([(pd.Timestamp('2026-01-21'), 'A', 'ヘルプ,15-19@武店')])
+    cache.apply_changes([change(101, '2026-01-20', 'A', '休み'), change(102, '2026-01-22', 'B', '休み'),
+                         change(103, '2026-01-21', 'A', '有給')])
+    frame = cache.get(2026, 1)
+    assert frame.loc['2026-01-22', 'B'] == '休み'
+    assert frame.loc['2026-01-21', 'A'] == 'ヘルプ,15-19@武店'
+    assert cache.cursor == 103
+
+
+def test_write_through_updates_only_cached_periods(cache, loader):
+    before = cache.get(2026, 1)
+    cache.write_through([(pd.Timestamp('2026-01-20'), 'A', '-'), (pd.Timestamp('2026-01-25'), 'C', '休み'),
+                         (pd.Timestamp('2026-03-20'), 'A', '休み')])
+    after = cache.get(2026, 1)
+    assert pd.isna(after.loc['2026-01-20', 'A'])
+    assert after.loc['2026-01-25', 'C'] == '休み'
+    # 呼び出し元に渡した DataFrame は変更しない
+    assert before.loc['2026-01-20', 'A'] == 'ヘルプ,10-15@本店'
+    assert not cache.contains(2026, 3)
+    assert len(loader.calls) == 1
+
+
+def test_invalidate_dates_drops_only_that_period(cache, loader):
+    cache.get_range(2026, 1, 2)
+    cache.invalidate_dates([pd.Timestamp('2026-02-01')])
+    assert not cache.contains(2026, 1)
+    assert cache.contains(2026, 2)
+    cache.get(2026, 1)
+    assert loader.calls[-1] == period_bounds(2026, 1)
+
+
+def test_get_range_loads_missing_periods_once(cache, loader):
+    cache.get(2026, 2)
+    frame = cache.get_range(2026, 1, 3)
+    assert loader.calls[-1] == (period_bounds(2026, 1)[0], period_bounds(2026, 3)[1])
+    assert frame.loc['2026-01-20', 'A'] == 'ヘルプ,10-15@本店'
+    assert frame.loc['2026-02-20', 'B'] == '休み'
+    assert all(cache.contains(2026, month) for month in (1, 2, 3))
+
+
+def test_failed_loads_are_not_cached(cache, loader):
+    loader.fail = True
+    assert cache.get(2026, 1).empty
+    assert cache.get_range(2026, 1, 3).empty
+    assert not any(cache.contains(2026, month) for month in (1, 2, 3))
+
+    loader.fail = False
+    assert cache.get(2026, 1).loc['2026-01-20', 'A'] == 'ヘルプ,10-15@本店'
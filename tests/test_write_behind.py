@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+import pandas as pd
+import pytest
+from write_behind import WriteBehindQueue
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.01)
+
+
+class FakeDB:
+    """save_shifts_bulk の呼び出しを記録する（gate が閉じている間は保存を待たせる）"""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.gate = threading.Event()
+        self.gate.set()
+        self.started = threading.Event()
+
+    def save_shifts_bulk(self, records):
+        self.started.set()
+        self.gate.wait()
+        self.batches.append(list(records))
+        return list(records) if self.fail else []
+
+
+def record(date, employee, shift_str):
+    return (pd.Timestamp(date), employee, shift_str)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return str(tmp_path / 'journal.jsonl')
+
+
+def read_journal(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_coalesces_writes_to_the_same_cell(journal):
+    db = FakeDB()
+    db.gate.clear()
+    flushed = []
+    queue = WriteBehindQueue(db, journal, flush_interval=0.01, on_flushed=flushed.extend)
+    queue.enqueue([record('2026-01-20', 'A', '休み')])
+    db.started.wait(5)
+
+    # 保存中に届いた同じセルへの変更は、最後の値だけを次の保存に回す
+    queue.enqueue([record('2026-01-21', 'A', '休み'), record('2026-01-21', 'A', '有給'),
+                   record('2026-01-21', 'A', 'ヘルプ,10-15@本店')])
+    assert queue.stats()['pending'] == 1
+    db.gate.set()
+
+    wait_until(lambda: queue.stats()['flushed'] == 2)
+    assert db.batches == [[record('2026-01-20', 'A', '休み')], [record('2026-01-21', 'A', 'ヘルプ,10-15@本店')]]
+    assert flushed == [record('2026-01-20', 'A', '休み'), record('2026-01-21', 'A', 'ヘルプ,10-15@本店')]
+
+
+def test_journal_is_compacted_after_a_flush(journal):
+    queue = WriteBehindQueue(FakeDB(), journal, flush_interval=0.01)
+    queue.enqueue([record('2026-01-20', 'A', '休み')])
+    wait_until(lambda: queue.stats()['flushed'] == 1)
+    wait_until(lambda: read_journal(journal) == [])
+
+
+def test_failed_records_move_to_failed_after_max_retries(journal):
+    db = FakeDB(fail=True)
+    queue = WriteBehindQueue(db, journal, flush_interval=0.001, max_retries=3)
+    queue.enqueue([record('2026-01-20', 'A', '休み')])
+
+    wait_until(lambda: queue.stats()['failed'] == 1)
+    assert len(db.batches) == 3
+    assert queue.stats() == {'pending': 0, 'in_flight': 0, 'failed': 1, 'flushed': 0}
+    # 失敗したレコードもジャーナルに残り、未保存として扱う
+    assert queue.pending_records() == [record('2026-01-20', 'A', '休み')]
+    assert read_journal(journal) == [{'date': '2026-01-20', 'employee': 'A', 'shift': '休み'}]
+
+    db.fail = False
+    queue.retry_failed()
+    wait_until(lambda: queue.stats()['flushed'] == 1)
+    assert queue.stats()['failed'] == 0
+
+
+def test_a_new_value_replaces_a_failed_one(journal):
+    db = FakeDB(fail=True)
+    queue = WriteBehindQueue(db, journal, flush_interval=0.001, max_retries=1)
+    queue.enqueue([record('2026-01-20', 'A', '休み')])
+    wait_until(lambda: queue.stats()['failed'] == 1)
+
+    db.fail = False
+    queue.enqueue([record('2026-01-20', 'A', '有給')])
+    wait_until(lambda: queue.stats()['flushed'] == 1)
+    assert db.batches[-1] == [record('2026-01-20', 'A', '有給')]
+    assert queue.stats()['failed'] == 0
+
+
+def test_replays_the_journal_on_start(journal):
+    with open(journal, 'w', encoding='utf-8') as f:
+        for date, employee, shift_str in [('2026-01-20', 'A', '休み'), ('2026-01-21', 'B', '有給'),
+                                          ('2026-01-20', 'A', '-')]:
+            f.write(json.dumps({'date': date, 'employee': employee, 'shift': shift_str}, ensure_ascii=False) + '\n')
+        # 書き込み途中で終了した最終行
+        f.write('{"date": "2026-01-22", "empl')
+
+    db = FakeDB()
+    queue = WriteBehindQueue(db, journal, flush_interval=0.01)
+    wait_until(lambda: queue.stats()['flushed'] == 2)
+    assert db.batches == [[record('2026-01-21', 'B', '有給'), record('2026-01-20', 'A', '-')]]
+    # 保存後はジャーナルを書き直すため、途中で切れた行も消える
+    wait_until(lambda: open(journal, encoding='utf-8').read() == '')
@@ -0,0 +1,173 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+
+# バックグラウンドのスレッドでは st.error が表示されないため、保存の失敗はログに出力する
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """シフトの保存を後回しにし、バックグラウンドでまとめて書き込むキュー
+
+    enqueue した変更はジャーナル（JSON Lines）に追記してから受け付けるため、
+    プロセスが終了しても次回起動時に再送される。同じ (date, employee) への
+    変更は最後の値だけを残し、db.save_shifts_bulk で一括保存する。
+    失敗したレコードは間隔を空けて再試行し、max_retries を超えたものは failed に移す。
+    """
+
+    def __init__(self, db, journal_path, flush_interval=1.0, max_batch=500, max_retries=5,
+                 on_flushed=None):
+        # on_flushed は保存できた (date, employee, shift_str) のリストを受け取る
+        self._db = db
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self._on_flushed = on_flushed
+        self._pending = OrderedDict()
+        self._in_flight = {}
+        self._failed = OrderedDict()
+        self._attempts = {}
+        self._retry_at = 0.0
+        self.flushed = 0
+        self._condition = threading.Condition()
+        self._journal_lock = threading.Lock()
+        self._replay_journal()
+        self._worker = threading.Thread(target=self._run, name='shift-write-behind', daemon=True)
+        self._worker.start()
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 書き込み途中で終了した最終行は無視する
+                    continue
+                key = (pd.Timestamp(entry['date']), entry['employee'])
+                self._pending.pop(key, None)
+                self._pending[key] = entry['shift']
+
+    @staticmethod
+    def _write_journal(f, records):
+        for date, employee, shift_str in records:
+            f.write(json.dumps({'date': date.strftime('%Y-%m-%d'), 'employee': employee,
+                                'shift': shift_str}, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+    def _compact_journal(self):
+        """未保存のレコードだけでジャーナルを書き直す"""
+        # ロックの順序は常に _journal_lock → _condition
+        with self._journal_lock:
+            tmp_path = self.journal_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                self._write_journal(f, self.pending_records())
+            os.replace(tmp_path, self.journal_path)
+
+    def enqueue(self, records):
+        """(date, employee, shift_str) のリストを受け付ける（ジャーナルへの追記後に戻る）"""
+        records = [(pd.Timestamp(date).normalize(), employee, shift_str) for date, employee, shift_str in records]
+        with self._journal_lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                self._write_journal(f, records)
+            with self._condition:
+                for date, employee, shift_str in records:
+                    key = (date, employee)
+                    self._pending.pop(key, None)
+                    self._pending[key] = shift_str
+                    self._failed.pop(key, None)
+                    self._attempts.pop(key, None)
+                self._condition.notify()
+
+    def pending_records(self):
+        """まだ保存されていない (date, employee, shift_str) のリスト（受け付け順）"""
+        with self._condition:
+            merged = OrderedDict(self._failed)
+            merged.update(self._in_flight)
+            merged.update(self._pending)
+        return [(date, employee, shift_str) for (date, employee), shift_str in merged.items()]
+
+    def retry_failed(self):
+        """再試行をあきらめたレコードを再びキューに戻す"""
+        with self._condition:
+            for key, shift_str in self._failed.items():
+                self._pending.setdefault(key, shift_str)
+                self._attempts.pop(key, None)
+            self._failed.clear()
+            self._retry_at = 0.0
+            self._condition.notify()
+
+    def stats(self):
+        """未保存・保存中・失敗の件数と、これまでに保存した件数"""
+        with self._condition:
+            return {'pending': len(self._pending), 'in_flight': len(self._in_flight),
+                    'failed': len(self._failed), 'flushed': self.flushed}
+
+    def _take_batch(self):
+        with self._condition:
+            while True:
+                wait = max(self._retry_at - time.monotonic(), 0.0)
+                if self._pending and wait == 0.0:
+                    break
+                self._condition.wait(wait or self.flush_interval)
+            batch = OrderedDict()
+            while self._pending and len(batch) < self.max_batch:
+                key, shift_str = self._pending.popitem(last=False)
+                batch[key] = shift_str
+            self._in_flight = batch
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            records = [(date, employee, shift_str) for (date, employee), shift_str in batch.items()]
+            try:
+                failed = self._db.save_shifts_bulk(records)
+            except Exception:
+                logger.exception('シフトの書き込みに失敗しました（%d 件）', len(records))
+                failed = records
+            else:
+                if failed:
+                    logger.warning('シフトの書き込みに失敗しました（%d / %d 件）', len(failed), len(records))
+            failed_keys = {(pd.Timestamp(date).normalize(), employee) for date, employee, _ in failed}
+
+            saved = [record for record in records if (record[0], record[1]) not in failed_keys]
+            with self._condition:
+                self._in_flight = {}
+                self.flushed += len(saved)
+                for key in failed_keys:
+                    if key in self._pending:
+                        # 保存中に新しい値が入った場合はそちらを優先する
+                        continue
+                    attempts = self._attempts.get(key, 0) + 1
+                    if attempts >= self.max_retries:
+                        logger.error('シフトの書き込みを %d 回失敗したため再試行を中止しました: %s %s',
+                                     attempts, key[0].strftime('%Y-%m-%d'), key[1])
+                        self._failed[key] = batch[key]
+                        self._attempts.pop(key, None)
+                    else:
+                        self._attempts[key] = attempts
+                        self._pending[key] = batch[key]
+                for date, employee, _ in saved:
+                    self._attempts.pop((date, employee), None)
+                if failed_keys:
+                    # 失敗が続く場合は間隔を広げて再試行する
+                    backoff = min(self.flush_interval * 2 ** max(self._attempts.values(), default=0), 60)
+                    self._retry_at = time.monotonic() + backoff
+
+            if saved and self._on_flushed is not None:
+                try:
+                    self._on_flushed(saved)
+                except Exception:
+                    logger.exception('書き込み後のキャッシュの更新に失敗しました')
+            self._compact_journal()